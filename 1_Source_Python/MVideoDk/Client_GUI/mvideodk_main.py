@@ -55,6 +55,10 @@ TOKEN_PATH = app_config.get_token_path()
 logger.info(f"🌐 Servidor base: {API_BASE}")
 logger.info(f"🔑 Token path: {TOKEN_PATH}")
 
+# Fuentes que identifican a cada cliente externo
+_EXT_TOKENS = frozenset({"EXT"})
+_MOBILE_TOKENS = frozenset({"MOBILE"})
+
 def _read_token() -> str:
     try:
         t = TOKEN_PATH.read_text(encoding="utf-8").strip()
@@ -803,6 +807,10 @@ class MVideoDkApp(QWidget):
         lay_logs = QVBoxLayout(grp_logs)
         self.txt_logs = QTextEdit()
         self.txt_logs.setReadOnly(True)
+        # Limitar líneas del log: las más antiguas se descartan
+        self.txt_logs.document().setMaximumBlockCount(
+            app_config.getint("gui", "log_lines", fallback=2000) or 2000
+        )
         lay_logs.addWidget(self.txt_logs)
         layout_main.addWidget(grp_logs, stretch=1)
         self.grp_logs = grp_logs
@@ -1717,8 +1725,10 @@ class MVideoDkApp(QWidget):
         Actualiza los labels de estado de Móvil y Extensión
         según si hay tareas con esas fuentes en la lista.
         """
-        has_ext = any((it.get("source") or "").upper() == "EXT" for it in rows)
-        has_mobile = any((it.get("source") or "").upper() == "MOBILE" for it in rows)
+        # Una sola pasada sobre las filas
+        sources = {(it.get("source") or "").upper() for it in rows}
+        has_ext = not _EXT_TOKENS.isdisjoint(sources)
+        has_mobile = not _MOBILE_TOKENS.isdisjoint(sources)
 
         # Extensión
         if has_ext:
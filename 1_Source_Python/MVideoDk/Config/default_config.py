@@ -47,6 +47,17 @@ def ensure_config_exists() -> None:
 # ==========================================================
 # 🔠 Prefijos de origen (IDs legibles)
 # ==========================================================
+_SOURCE_PREFIXES = {
+    "MOBILE": "M",
+    "EXT": "E",
+    "CLIPBOARD": "C",
+    "FILE": "F",
+    "GUI": "G",
+    "API": "A",
+    "SYSTEM": "S",
+}
+
+
 def get_source_prefix(source: str) -> str:
     """
     Devuelve el prefijo asociado a un tipo de origen.
@@ -63,13 +74,4 @@ def get_source_prefix(source: str) -> str:
 
     Si el origen no está mapeado → retorna "?".
     """
-    prefix_map = {
-        "MOBILE": "M",
-        "EXT": "E",
-        "CLIPBOARD": "C",
-        "FILE": "F",
-        "GUI": "G",
-        "API": "A",
-        "SYSTEM": "S",
-    }
-    return prefix_map.get(source.upper(), "?")
+    return _SOURCE_PREFIXES.get(source.upper(), "?")
@@ -14,12 +14,14 @@ Características:
 - Singleton thread-safe.
 - Crea config.ini si no existe.
 - Rellena claves faltantes sin sobrescribir valores existentes.
-- Notifica listeners ante cambios.
+- Notifica listeners ante cambios (vía señal Qt si hay GUI).
 - Proporciona getters tipados y robustos.
 """
 
 import configparser
+import sys
 import threading
+from functools import lru_cache
 from pathlib import Path
 
 from Core.paths import (
@@ -33,6 +35,14 @@ from Core.paths import (
 )
 
 
+# ==========================================================
+# 📡 Notificador Qt (entrega de cambios en el hilo de la GUI)
+# ==========================================================
+# Clase QObject creada en add_listener: PyQt6 es opcional y el servidor y
+# sus procesos hijos no deben importar QtCore aunque esté empaquetado.
+_ConfigNotifier = None
+
+
 # ==========================================================
 # 🧩 Clase principal AppConfig (Singleton)
 # ==========================================================
@@ -51,6 +61,15 @@ class AppConfig:
             "host": "127.0.0.1",
             "port": "8334",
             "reload": "false",
+            "auth_cache_ttl": "60",
+            "pending_batch": "5",
+            "max_parallel_downloads": "2",  # procesos de descarga (cada uno con su Chromium)
+            "cors_origins": "*",
+            "loop": "auto",
+            "http": "auto",
+            "workers": "1",  # uvicorn: siempre 1 (el Worker vive en el proceso)
+            "access_log": "false",
+            "worker_cpus": "",
         },
         "paths": {
             "download_dir": str(downloads_dir()),
@@ -82,6 +101,7 @@ class AppConfig:
             "theme": "dark",
             "auto_refresh": "true",
             "rows_per_page": "25",
+            "log_lines": "2000",
         },
         "postprocess": {
             "enabled": "false",
@@ -109,6 +129,9 @@ class AppConfig:
         self.config_file = config_ini_path()
         self.parser = configparser.ConfigParser()
         self.listeners = []
+        self._notifier = None
+        self._loaded = False
+        self._on_disk: set[tuple[str, str]] = set()
         self.load()
 
     # ======================================================
@@ -119,26 +142,47 @@ class AppConfig:
         Garantiza que config.ini exista y contenga todas las claves.
         - Si no existe → se crea con DEFAULTS.
         - Si existe → se rellenan claves faltantes.
+
+        El archivo solo se parsea una vez: si ya se cargó en la
+        construcción del singleton no se vuelve a leer.
         """
         if not self.config_file.exists():
             self.config_file.parent.mkdir(parents=True, exist_ok=True)
             self._write_defaults()
         else:
-            self.load()
+            if not self._loaded:
+                self.load()
             self._fill_missing_defaults()
-            self.save()
 
     def load(self):
         """Carga los valores DEFAULTS y luego los del archivo si existe."""
         self.parser.read_dict(self.DEFAULTS)
+        self._on_disk = set()
         if self.config_file.exists():
-            self.parser.read(self.config_file, encoding="utf-8")
+            text = self.config_file.read_text(encoding="utf-8")
+            self.parser.read_string(text, source=str(self.config_file))
+
+            # Parser aparte sin DEFAULTS: qué claves existen de verdad en disco
+            raw = configparser.ConfigParser(interpolation=None)
+            raw.read_string(text, source=str(self.config_file))
+            self._on_disk = {
+                (section, key)
+                for section in raw.sections()
+                for key in raw.options(section)
+            }
+            self._loaded = True
 
     def save(self):
-        """Guarda la configuración actual en config.ini."""
+        """
+        Guarda la configuración actual en config.ini.
+        Escribe primero a un archivo temporal y lo reemplaza de forma
+        atómica para no dejar un config.ini a medias si hay un cierre.
+        """
         self.config_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.config_file, "w", encoding="utf-8") as f:
+        tmp = self.config_file.with_suffix(".ini.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
             self.parser.write(f)
+        tmp.replace(self.config_file)
 
     def _write_defaults(self):
         """Crea un config.ini limpio con valores por defecto."""
@@ -146,21 +190,30 @@ class AppConfig:
         self.save()
 
     def _fill_missing_defaults(self):
-        """Inserta claves faltantes sin reemplazar valores existentes."""
+        """
+        Inserta claves faltantes sin reemplazar valores existentes.
+        El parser ya trae DEFAULTS fusionados, así que lo que se compara
+        es el contenido real del archivo (registrado en load()).
+        """
         updated = False
 
         for section, values in self.DEFAULTS.items():
             if not self.parser.has_section(section):
                 self.parser[section] = values
                 updated = True
-            else:
-                for key, value in values.items():
-                    if not self.parser.has_option(section, key):
-                        self.parser.set(section, key, value)
-                        updated = True
+            for key, value in values.items():
+                if not self.parser.has_option(section, key):
+                    self.parser.set(section, key, value)
+                if (section, key) not in self._on_disk:
+                    updated = True
 
         if updated:
             self.save()
+            self._on_disk = {
+                (section, key)
+                for section in self.parser.sections()
+                for key in self.parser.options(section)
+            }
 
     # ======================================================
     # 🔍 Métodos GET genéricos
@@ -253,24 +306,73 @@ class AppConfig:
     # 🔔 Listeners de configuración
     # ======================================================
     def add_listener(self, callback):
-        """Registra funciones que reaccionan a cambios en config."""
-        if callable(callback):
-            self.listeners.append(callback)
+        """
+        Registra funciones que reaccionan a cambios en config.
+        - Con una QApplication activa → se conecta a una señal Qt en modo
+          QueuedConnection (el callback corre en el event loop de la GUI).
+        - Sin Qt → se guarda en la lista de listeners síncronos.
+        """
+        global _ConfigNotifier
+
+        if not callable(callback):
+            return
+
+        # Sin QtCore ya cargado no puede haber QApplication: no se importa Qt
+        if "PyQt6.QtCore" in sys.modules:
+            from PyQt6.QtCore import QObject, QCoreApplication, Qt, pyqtSignal
+
+            if QCoreApplication.instance() is not None:
+                if _ConfigNotifier is None:
+                    class _ConfigNotifier(QObject):
+                        """Emite (section, key, value) para listeners conectados vía Qt."""
+                        changed = pyqtSignal(str, str, object)
+
+                if self._notifier is None:
+                    self._notifier = _ConfigNotifier()
+                self._notifier.changed.connect(
+                    callback, Qt.ConnectionType.QueuedConnection
+                )
+                return
+
+        self.listeners.append(callback)
 
     def set(self, section: str, key: str, value):
         """
         Modifica la configuración y notifica listeners.
         - Crea la sección si no existe.
+        - Si el valor no cambia, no guarda ni notifica.
         - Guarda inmediatamente en disco.
         """
         if not self.parser.has_section(section):
             self.parser.add_section(section)
 
-        self.parser.set(section, key, str(value))
+        new_value = str(value)
+        if self.parser.get(section, key, fallback=None) == new_value:
+            return
+
+        self.parser.set(section, key, new_value)
         self.save()
 
+        if self._notifier is not None:
+            self._notifier.changed.emit(section, key, value)
+
         for cb in self.listeners:
             try:
                 cb(section, key, value)
             except Exception:
                 pass
+
+
+# ==========================================================
+# 🏭 Acceso compartido (inicializado una sola vez)
+# ==========================================================
+@lru_cache(maxsize=1)
+def get_config() -> AppConfig:
+    """
+    Devuelve el singleton AppConfig ya inicializado.
+    initialize() (comprobación de config.ini y claves faltantes) se
+    ejecuta solo en la primera llamada.
+    """
+    cfg = AppConfig()
+    cfg.initialize()
+    return cfg
@@ -10,7 +10,7 @@ Mejoras v20:
 - Mantiene exactamente la misma lógica y compatibilidad total.
 
 Características:
-- Logs rotativos diarios con TimedRotatingFileHandler.
+- Logs rotativos diarios con TimedRotatingFileHandler (proceso principal).
 - Consola unificada con formato consistente.
 - Nivel configurable desde config.ini ([logging].level).
 - Guarda logs bajo ProgramData / directorio asignado en Core.paths.
@@ -18,6 +18,7 @@ Características:
 
 import sys
 import logging
+import multiprocessing
 from logging.handlers import TimedRotatingFileHandler
 
 from Core.paths import logs_dir
@@ -69,12 +70,18 @@ class LoggerFactory:
             return logger
 
         # ---------- File handler (rotación diaria) ----------
-        file_handler = TimedRotatingFileHandler(
-            filename=log_path,
-            when="midnight",
-            backupCount=7,
-            encoding="utf-8",
-        )
+        # Solo el proceso principal rota: los procesos hijos (pool de
+        # descargas, Manager) escriben en modo append sin renombrar
+        # el archivo, así la rotación no se rompe entre procesos.
+        if multiprocessing.parent_process() is None:
+            file_handler = TimedRotatingFileHandler(
+                filename=log_path,
+                when="midnight",
+                backupCount=7,
+                encoding="utf-8",
+            )
+        else:
+            file_handler = logging.FileHandler(log_path, encoding="utf-8")
 
         formatter = logging.Formatter(
             fmt="[%(asctime)s] [%(levelname)s] %(name)s: %(message)s",
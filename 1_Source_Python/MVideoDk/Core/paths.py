@@ -133,6 +133,11 @@ def token_path() -> Path:
     return data_dir() / "token.key"
 
 
+def shortlink_cache_path() -> Path:
+    """Ruta base del caché persistente de shortlinks (shelve)."""
+    return data_dir() / "shortlinks.cache"
+
+
 def config_ini_path() -> Path:
     """Ruta al archivo config.ini principal."""
     return config_dir() / "config.ini"
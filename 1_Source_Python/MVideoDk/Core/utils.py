@@ -19,6 +19,7 @@ Mejoras v20:
 
 import re
 from datetime import datetime
+from urllib.parse import SplitResult, urlsplit
 
 # ==========================================================
 # 🔗 Validación de URLs
@@ -32,7 +33,15 @@ except Exception:
 _URL_FALLBACK_RE = re.compile(r"^https?://[^\s]+$", re.IGNORECASE)
 
 
-def is_valid_url(url: str) -> bool:
+def parse_once(url: str) -> SplitResult:
+    """
+    Divide una URL con urlsplit (que ya memoriza sus resultados).
+    Permite reutilizar el mismo parseo en validación y extracción de dominio.
+    """
+    return urlsplit(url.strip())
+
+
+def is_valid_url(url: str, parsed: SplitResult | None = None) -> bool:
     """
     Valida una URL:
     - Si la librería `validators` está instalada, se usa primero.
@@ -40,6 +49,8 @@ def is_valid_url(url: str) -> bool:
 
     Args:
         url (str): Cadena a validar.
+        parsed (SplitResult | None): resultado previo de parse_once(url);
+            si no tiene dominio se descarta sin más validación.
 
     Returns:
         bool: True si parece una URL válida.
@@ -51,6 +62,9 @@ def is_valid_url(url: str) -> bool:
     if not url:
         return False
 
+    if parsed is not None and not parsed.netloc:
+        return False
+
     if _validators is not None:
         try:
             return bool(_validators.url(url))
@@ -113,6 +127,17 @@ def format_progress(value: float | int | None) -> str:
         return "--"
 
 
+# Estados conocidos → texto amigable (se construye una sola vez)
+_STATUS_MAP = {
+    "PENDING":    "🕓 Pendiente",
+    "DOWNLOADING": "⬇️ Descargando",
+    "COMPLETED":  "✅ Completado",
+    "ERROR":      "❌ Error",
+    "PAUSED":     "⏸️ Pausado",
+    "CANCELLED":  "🛑 Cancelado",
+}
+
+
 def format_status(status: str) -> str:
     """
     Devuelve una versión amigable del estado para la GUI/logs.
@@ -121,31 +146,49 @@ def format_status(status: str) -> str:
         return "Desconocido"
 
     s = status.strip().upper()
-    mapping = {
-        "PENDING":    "🕓 Pendiente",
-        "DOWNLOADING": "⬇️ Descargando",
-        "COMPLETED":  "✅ Completado",
-        "ERROR":      "❌ Error",
-        "PAUSED":     "⏸️ Pausado",
-        "CANCELLED":  "🛑 Cancelado",
-    }
-    return mapping.get(s, s.title())
+    return _STATUS_MAP.get(s, s.title())
 
 
-def extract_domain(url: str) -> str:
+def extract_domain(url: str, parsed: SplitResult | None = None) -> str:
     """
     Extrae el dominio base de una URL:
         https://www.youtube.com/watch → youtube.com
+
+    Acepta opcionalmente el resultado de parse_once(url) ya calculado.
     """
     if not isinstance(url, str) or not url:
         return ""
-    m = re.search(r"https?://(?:www\.)?([^/]+)", url)
-    return m.group(1) if m else ""
+    if parsed is None:
+        try:
+            parsed = parse_once(url)
+        except ValueError:
+            return ""
+    if parsed.scheme.lower() not in ("http", "https"):
+        return ""
+    netloc = parsed.netloc
+    return netloc[4:] if netloc.lower().startswith("www.") else netloc
 
 
 # ==========================================================
 # 🏷️ Construcción de títulos amigables para GUI
 # ==========================================================
+# Dominio (sufijo) → nombre de plataforma
+_PLATFORM_SUFFIXES = (
+    ("youtube.com", "YouTube"),
+    ("youtu.be", "YouTube"),
+    ("tiktok.com", "TikTok"),
+    ("instagram.com", "Instagram"),
+    ("instagr.am", "Instagram"),
+    ("facebook.com", "Facebook"),
+    ("fb.watch", "Facebook"),
+    ("twitter.com", "Twitter/X"),
+    ("x.com", "Twitter/X"),
+)
+_PLATFORMS = dict(_PLATFORM_SUFFIXES)
+
+_AUDIO_MODES = frozenset({"AUDIO", "MP3", "M4A"})
+
+
 def build_friendly_title(
     url: str,
     filename: str | None = None,
@@ -175,20 +218,14 @@ def build_friendly_title(
         clean = (url or "").strip()
         return clean if clean else "Descarga"
 
-    dom_l = dom.lower()
-
-    if "youtube.com" in dom_l or "youtu.be" in dom_l:
-        platform = "YouTube"
-    elif "tiktok.com" in dom_l:
-        platform = "TikTok"
-    elif "instagram.com" in dom_l or "instagr.am" in dom_l:
-        platform = "Instagram"
-    elif "facebook.com" in dom_l or "fb.watch" in dom_l:
-        platform = "Facebook"
-    elif "twitter.com" in dom_l or "x.com" in dom_l:
-        platform = "Twitter/X"
-    else:
-        platform = dom
+    # Probar sufijos sucesivos: m.youtube.com → youtube.com → com
+    parts = dom.lower().split(":", 1)[0].split(".")
+    platform = dom
+    for i in range(len(parts)):
+        name = _PLATFORMS.get(".".join(parts[i:]))
+        if name:
+            platform = name
+            break
 
     # 3) Tipo de media
     media_type = "Video"
@@ -196,7 +233,7 @@ def build_friendly_title(
         m = str(mode).strip().upper()
         if m == "PLAYLIST":
             media_type = "Playlist"
-        elif m in ("AUDIO", "MP3", "M4A"):
+        elif m in _AUDIO_MODES:
             media_type = "Audio"
 
     return f"{media_type} de {platform}"
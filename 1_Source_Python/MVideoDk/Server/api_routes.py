@@ -14,14 +14,13 @@ Totalmente compatible con GUI, servidor y extensión actuales.
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, field_validator
 
-from Server.security import verify_token, get_token_digest
-from Server.database import Database
+from Server.security import auth_required, get_token_digest
+from Server.database import Database, TASK_LIST_COLUMNS
 from Core.logger import LoggerFactory
-from Core.utils import is_valid_url
+from Core.utils import is_valid_url, parse_once
 from Core.app_config import AppConfig
 from Config.default_config import get_source_prefix  # Prefijos tipo “G”, “C”, etc.
 
@@ -34,24 +33,60 @@ cfg.initialize()
 
 logger = LoggerFactory.get_logger("API")
 router = APIRouter(prefix="/api", tags=["MVideoDk API"])
-security = HTTPBearer()
 db = Database()
 
+# Callbacks sin argumentos llamados tras encolar una tarea (p. ej. worker.notify)
+_enqueue_listeners: List = []
+
+# Caché de /api/ext/config → ((mtime_token, server_url), respuesta)
+_EXT_CFG_CACHE: tuple[tuple, dict] | None = None
+
 SERVER_NAME = cfg.get("server", "name", fallback="MVideoDk Central Server")
 SERVER_URL = cfg.get_server_url()
 
 logger.info(f"✅ API inicializada en {SERVER_URL}")
 
 
+def add_enqueue_listener(callback) -> None:
+    """Registra un callback que se ejecuta cada vez que se encola una tarea."""
+    _enqueue_listeners.append(callback)
+
+
 # ==========================================================
 # 📦 MODELOS PYDANTIC
 # ==========================================================
+_QUEUE_MODES = frozenset({"VIDEO", "PLAYLIST"})
+
+
 class QueueRequest(BaseModel):
-    """Payload del POST /api/queue."""
+    """
+    Payload del POST /api/queue.
+    La normalización (strip / mayúsculas / modo por defecto) la hace
+    Pydantic al validar, no el endpoint.
+    """
     url: str
     source: str = "UNKNOWN"
     mode: Optional[str] = "VIDEO"  # VIDEO o PLAYLIST
 
+    @field_validator("url")
+    @classmethod
+    def _strip_url(cls, v: str) -> str:
+        return v.strip()
+
+    @field_validator("source")
+    @classmethod
+    def _normalize_source(cls, v: str) -> str:
+        return v.strip() or "UNKNOWN"
+
+    @field_validator("mode")
+    @classmethod
+    def _normalize_mode(cls, v: Optional[str]) -> str:
+        m = (v or "VIDEO").strip().upper()
+        if m not in _QUEUE_MODES:
+            logger.warning(f"Modo inválido '{m}', usando VIDEO.")
+            return "VIDEO"
+        return m
+
 
 class TaskItem(BaseModel):
     """Representación serializable de un registro de tarea."""
@@ -71,26 +106,6 @@ class TaskItem(BaseModel):
     mode: Optional[str] = None
 
 
-# ==========================================================
-# 🔒 AUTENTICACIÓN BEARER
-# ==========================================================
-def auth_required(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-) -> bool:
-    """
-    Dependencia global para proteger rutas con Bearer Token.
-    Lanza 401 si el token es inválido.
-    """
-    token = credentials.credentials
-    if not verify_token(token):
-        logger.warning("Acceso no autorizado detectado en la API.")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="No autorizado"
-        )
-    return True
-
-
 # ==========================================================
 # 🔎 PING / ESTADO DEL SERVIDOR
 # ==========================================================
@@ -123,21 +138,19 @@ def enqueue(payload: QueueRequest, auth: bool = Depends(auth_required)):
     """
     logger.debug("🟡 /api/queue llamado")
 
-    url = (payload.url or "").strip()
-    source = (payload.source or "UNKNOWN").strip() or "UNKNOWN"
-    mode = (payload.mode or "VIDEO").strip().upper()
+    # Ya normalizados por QueueRequest
+    url, source, mode = payload.url, payload.source, payload.mode
 
     logger.debug(f"Payload recibido → url={url}, source={source}, mode={mode}")
 
-    # Validación de modo
-    if mode not in ("VIDEO", "PLAYLIST"):
-        logger.warning(f"Modo inválido '{mode}', usando VIDEO.")
-        mode = "VIDEO"
-
-    # Validación de URL
+    # Validación de URL (400 con mensaje propio, no 422 de Pydantic)
     if not url:
         raise HTTPException(status_code=400, detail="URL requerida")
-    if not is_valid_url(url):
+    try:
+        parsed = parse_once(url)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="URL inválida")
+    if not is_valid_url(url, parsed):
         raise HTTPException(status_code=400, detail="URL inválida")
 
     # Prefijo de fuente
@@ -158,6 +171,11 @@ def enqueue(payload: QueueRequest, auth: bool = Depends(auth_required)):
     logger.info(
         f"Tarea encolada #{task_id} ({source_prefix}) desde {source}, mode={mode}"
     )
+    for callback in _enqueue_listeners:
+        try:
+            callback()
+        except Exception as e:
+            logger.warning(f"Error notificando encolado: {e}")
     return {"task_id": task_id, "detail": "OK"}
 
 
@@ -167,32 +185,27 @@ def enqueue(payload: QueueRequest, auth: bool = Depends(auth_required)):
 @router.get("/status")
 def get_status(
     limit: int = 50,
+    before_id: Optional[int] = None,
     offset: int = 0,
     auth: bool = Depends(auth_required),
 ):
-    """Devuelve tareas existentes en la cola, paginadas."""
-    tasks = db.list_tasks(limit=limit, offset=offset)
-    items: List[dict] = []
-
-    for row in tasks:
-        items.append({
-            "id": row[0],
-            "url": row[1],
-            "status": row[2],
-            "progress": row[3],
-            "source": row[4],
-            "added_at": row[5],
-            "error_msg": row[6],
-            "retry_count": row[7] if len(row) > 7 else None,
-            "completed_at": row[8] if len(row) > 8 else None,
-            "filename": row[9] if len(row) > 9 else None,
-            "filepath": row[10] if len(row) > 10 else None,
-            "local_id": row[11] if len(row) > 11 else None,
-            "source_prefix": row[12] if len(row) > 12 else None,
-            "mode": row[13] if len(row) > 13 else None,
-        })
-
-    return {"items": items}
+    """
+    Devuelve tareas existentes en la cola, paginadas por cursor.
+
+    - before_id   → id de la última tarea recibida (usar `next_cursor`).
+    - offset      → obsoleto; solo se usa si no se envía before_id.
+    - next_cursor → valor para pedir la siguiente página (None si no hay más).
+    """
+    if before_id is None and offset:
+        logger.debug("/api/status con offset (obsoleto); usar before_id.")
+
+    tasks = db.list_tasks(limit=limit, offset=offset, before_id=before_id)
+    items: List[dict] = [dict(zip(TASK_LIST_COLUMNS, row)) for row in tasks]
+
+    return {
+        "items": items,
+        "next_cursor": items[-1]["id"] if items else None,
+    }
 
 
 # ==========================================================
@@ -202,14 +215,10 @@ def get_status(
 def get_counters(auth: bool = Depends(auth_required)):
     """Devuelve el contador de IDs locales por fuente (GUI, EXT, MOBILE…)."""
     try:
-        with db._connect() as conn:
-            c = conn.cursor()
-            c.execute("SELECT source, last_local_id FROM counters")
-            rows = c.fetchall()
         return {
             "counters": [
                 {"source": src, "last_local_id": lid}
-                for src, lid in rows
+                for src, lid in db.iter_counters()
             ]
         }
     except Exception as e:
@@ -225,19 +234,37 @@ def get_extension_config():
     """
     Devuelve la configuración mínima requerida por la extensión.
     No requiere token para ser consultado.
+
+    La respuesta se cachea y solo se reconstruye si cambia el token
+    (mtime del archivo) o la URL del servidor.
     """
-    cfg = AppConfig()
+    global _EXT_CFG_CACHE
+
     server_url = cfg.get_server_url()
+    token_file = cfg.get_token_path()
+
+    try:
+        mtime = token_file.stat().st_mtime
+    except OSError:
+        mtime = None
+
+    key = (mtime, server_url)
+    if _EXT_CFG_CACHE is not None and _EXT_CFG_CACHE[0] == key:
+        return _EXT_CFG_CACHE[1]
 
     try:
-        token = cfg.get_token_path().read_text(encoding="utf-8").strip()
+        token = token_file.read_text(encoding="utf-8").strip()
     except Exception:
         token = ""
 
-    return {
+    data = {
         "server_url": server_url,
         "scheme": cfg.get("server", "scheme"),
         "host": cfg.get("server", "host"),
         "port": cfg.get("server", "port"),
         "token": token,
     }
+
+    if mtime is not None:
+        _EXT_CFG_CACHE = (key, data)
+    return data
@@ -7,6 +7,7 @@ Capa de acceso a datos del servidor MVideoDK.
 Proporciona:
 - Esquema SQLite para cola de descargas
 - Gestión segura de concurrencia con RLock
+- Una conexión persistente por hilo (sin reabrir ni repetir PRAGMAs)
 - Contadores locales por fuente (GUI, EXT, MOBILE, etc.)
 - Utilidades de mantenimiento (reset, limpieza de tareas atascadas)
 
@@ -15,6 +16,9 @@ La ruta de la base de datos proviene de AppConfig → [paths] database_path.
 
 import sqlite3
 import threading
+import time
+from collections import deque
+from typing import Iterable
 from pathlib import Path
 
 from Core.paths import database_path
@@ -37,6 +41,81 @@ STATUS_COMPLETED = "COMPLETED"
 STATUS_ERROR = "ERROR"
 STATUS_CANCELLED = "CANCELLED"
 
+# Columnas devueltas por list_tasks (mismo orden que el SELECT)
+TASK_LIST_COLUMNS = (
+    "id", "url", "status", "progress", "source", "added_at", "error_msg",
+    "retry_count", "completed_at", "filename", "filepath",
+    "local_id", "source_prefix", "mode",
+)
+
+
+# ==========================================================
+# 🧱 ESQUEMA
+# ==========================================================
+# Incrementar al cambiar tablas o índices
+SCHEMA_VERSION = 1
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    source TEXT,
+    local_id INTEGER DEFAULT 0,
+    source_prefix TEXT DEFAULT '',
+    mode TEXT DEFAULT 'VIDEO',
+    filename TEXT,
+    filepath TEXT,
+    status TEXT DEFAULT 'PENDING',
+    progress REAL DEFAULT 0.0,
+    retry_count INTEGER DEFAULT 0,
+    added_at TEXT DEFAULT (datetime('now')),
+    completed_at TEXT,
+    error_msg TEXT
+);
+
+-- (status, id): sirve a get_next_pending sin ordenar y a cualquier
+-- filtro por status; reemplaza al antiguo idx_tasks_status
+CREATE INDEX IF NOT EXISTS idx_tasks_status_id ON tasks(status, id);
+DROP INDEX IF EXISTS idx_tasks_status;
+CREATE INDEX IF NOT EXISTS idx_tasks_added_at ON tasks(added_at);
+
+CREATE TABLE IF NOT EXISTS counters (
+    source TEXT PRIMARY KEY,
+    last_local_id INTEGER DEFAULT 0
+);
+"""
+
+
+# ==========================================================
+# 📈 BUFFER DE PROGRESO (escrituras agrupadas)
+# ==========================================================
+class ProgressBuffer:
+    """
+    Acumula actualizaciones de progreso y las vuelca en lote.
+
+    - push()  → encola (task_id, pct) y vuelca si pasó `interval` segundos.
+    - flush() → vuelca lo pendiente (llamar antes de cambiar de estado).
+    """
+
+    def __init__(self, db: "Database", interval: float = 0.25, maxlen: int = 256):
+        self.db = db
+        self.interval = interval
+        self._items: deque[tuple[int, float]] = deque(maxlen=maxlen)
+        self._last_flush = time.monotonic()
+
+    def push(self, task_id: int, progress: float) -> None:
+        self._items.append((task_id, progress))
+        if time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._items:
+            # Solo el último valor de cada tarea
+            latest = dict(self._items)
+            self.db.update_progress_batch(list(latest.items()))
+            self._items.clear()
+        self._last_flush = time.monotonic()
+
 
 # ==========================================================
 # 🗄️ CLASE PRINCIPAL
@@ -53,60 +132,70 @@ class Database:
         - Limpieza y reinicios
     """
 
+    # Sentencias fijas para las actualizaciones más frecuentes
+    _STMT_STATUS = "UPDATE tasks SET status=? WHERE id=?"
+    _STMT_PROGRESS = "UPDATE tasks SET status=?, progress=? WHERE id=?"
+    _STMT_ERROR = "UPDATE tasks SET status=?, error_msg=? WHERE id=?"
+
     def __init__(self):
         self.db_path = database_path()
+        self._tls = threading.local()
         self._ensure_schema()
         logger.info(f"🧱 Base de datos inicializada en {self.db_path}")
 
     # ------------------------------------------------------
     # 🔗 CONEXIÓN Y ESQUEMA
     # ------------------------------------------------------
-    def _connect(self) -> sqlite3.Connection:
-        """Crea conexión con PRAGMAs para mejorar concurrencia y rendimiento."""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA synchronous=NORMAL;")
-        conn.execute("PRAGMA foreign_keys=ON;")
+    def _conn(self) -> sqlite3.Connection:
+        """
+        Devuelve la conexión persistente del hilo actual.
+
+        Se crea una sola vez por hilo (threading.local) y los PRAGMAs se
+        aplican solo en ese momento. Usarla con `with` delimita la
+        transacción (commit / rollback), no cierra la conexión.
+        """
+        conn = getattr(self._tls, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                cached_statements=256,
+            )
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.execute("PRAGMA foreign_keys=ON;")
+            self._tls.conn = conn
         return conn
 
     def _ensure_schema(self) -> None:
-        """Crea tablas e índices si no existen (idempotente)."""
-        with self._connect() as conn:
-            c = conn.cursor()
-
-            c.execute(
-                """
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT NOT NULL,
-                    source TEXT,
-                    local_id INTEGER DEFAULT 0,
-                    source_prefix TEXT DEFAULT '',
-                    mode TEXT DEFAULT 'VIDEO',
-                    filename TEXT,
-                    filepath TEXT,
-                    status TEXT DEFAULT 'PENDING',
-                    progress REAL DEFAULT 0.0,
-                    retry_count INTEGER DEFAULT 0,
-                    added_at TEXT DEFAULT (datetime('now')),
-                    completed_at TEXT,
-                    error_msg TEXT
-                );
-                """
-            )
+        """
+        Crea tablas e índices si no existen (idempotente).
+        Se omite si PRAGMA user_version ya está en SCHEMA_VERSION.
+        """
+        with self._conn() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
 
-            c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status   ON tasks(status)")
-            c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_added_at ON tasks(added_at)")
+            conn.executescript(_SCHEMA_SQL)
 
-            c.execute(
-                """
-                CREATE TABLE IF NOT EXISTS counters (
-                    source TEXT PRIMARY KEY,
-                    last_local_id INTEGER DEFAULT 0
-                );
-                """
-            )
+            # Unicidad de URL en cola activa (PENDING / DOWNLOADING)
+            try:
+                conn.execute(
+                    """
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_active_url
+                    ON tasks(url) WHERE status IN ('PENDING', 'DOWNLOADING')
+                    """
+                )
+            except sqlite3.IntegrityError:
+                # Sin marcar versión: se reintenta en el próximo arranque
+                logger.warning(
+                    "⚠️ Hay URLs duplicadas en cola activa; "
+                    "no se pudo crear idx_tasks_active_url."
+                )
+                return
 
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
             conn.commit()
 
     # ======================================================
@@ -122,28 +211,39 @@ class Database:
             - None si se considera duplicado
         """
         with lock:
-            with self._connect() as conn:
+            with self._conn() as conn:
                 c = conn.cursor()
 
-                # Evitar duplicados en cola activa
-                c.execute(
-                    "SELECT id FROM tasks WHERE url=? AND status IN (?, ?)",
-                    (url, STATUS_PENDING, STATUS_DOWNLOADING),
-                )
-                if c.fetchone():
+                local_id = self._next_local_id(c, source)
+                prefix = get_source_prefix(source)
+
+                # Insertar solo si no hay otra igual en cola activa
+                # (verificación + inserción en una sola sentencia)
+                try:
+                    c.execute(
+                        """
+                        INSERT INTO tasks (url, source, local_id, source_prefix, mode)
+                        SELECT ?, ?, ?, ?, ?
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM tasks WHERE url=? AND status IN (?, ?)
+                        )
+                        """,
+                        (
+                            url, source, local_id, prefix, mode,
+                            url, STATUS_PENDING, STATUS_DOWNLOADING,
+                        ),
+                    )
+                    inserted = c.rowcount > 0
+                except sqlite3.IntegrityError:
+                    # El índice único parcial detectó el duplicado
+                    inserted = False
+
+                if not inserted:
+                    # Deshacer también el incremento del contador
+                    conn.rollback()
                     logger.info(f"Tarea duplicada ignorada: {url}")
                     return None
 
-                local_id = self.get_next_local_id(source)
-                prefix = get_source_prefix(source)
-
-                c.execute(
-                    """
-                    INSERT INTO tasks (url, source, local_id, source_prefix, mode)
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
-                    (url, source, local_id, prefix, mode),
-                )
                 conn.commit()
 
                 task_id = c.lastrowid
@@ -153,7 +253,7 @@ class Database:
     def get_task_by_id(self, task_id: int):
         """Devuelve el registro completo de una tarea por ID."""
         with lock:
-            with self._connect() as conn:
+            with self._conn() as conn:
                 c = conn.cursor()
                 c.execute("SELECT * FROM tasks WHERE id=?", (task_id,))
                 return c.fetchone()
@@ -161,7 +261,7 @@ class Database:
     def get_next_pending(self):
         """Devuelve la siguiente tarea pendiente (orden ascendente por ID)."""
         with lock:
-            with self._connect() as conn:
+            with self._conn() as conn:
                 c = conn.cursor()
                 c.execute(
                     "SELECT * FROM tasks WHERE status=? ORDER BY id ASC LIMIT 1",
@@ -169,6 +269,41 @@ class Database:
                 )
                 return c.fetchone()
 
+    def get_next_pending_batch(self, limit: int) -> list[tuple]:
+        """
+        Reclama hasta `limit` tareas PENDING (orden ascendente por ID).
+
+        En una sola sentencia las pasa a DOWNLOADING y las devuelve, así
+        ninguna otra lectura puede tomarlas. Las que no lleguen a ejecutarse
+        se devuelven a la cola con release_tasks().
+        """
+        with lock:
+            with self._conn() as conn:
+                rows = conn.execute(
+                    """
+                    UPDATE tasks SET status=?
+                    WHERE id IN (
+                        SELECT id FROM tasks WHERE status=? ORDER BY id ASC LIMIT ?
+                    )
+                    RETURNING *
+                    """,
+                    (STATUS_DOWNLOADING, STATUS_PENDING, limit),
+                ).fetchall()
+        # RETURNING no garantiza orden
+        rows.sort(key=lambda r: r[0])
+        return rows
+
+    def release_tasks(self, task_ids: list[int]) -> None:
+        """Devuelve a PENDING tareas reclamadas que no llegaron a ejecutarse."""
+        if not task_ids:
+            return
+        with lock:
+            with self._conn() as conn:
+                conn.executemany(
+                    "UPDATE tasks SET status=? WHERE id=? AND status=?",
+                    [(STATUS_PENDING, tid, STATUS_DOWNLOADING) for tid in task_ids],
+                )
+
     def update_status(
         self,
         task_id: int,
@@ -182,11 +317,30 @@ class Database:
         """
         Actualiza múltiples campos de manera segura.
         Solo se aplican los valores que no son None.
+
+        Las combinaciones habituales (solo estado, estado+progreso,
+        estado+error) usan sentencias fijas; el resto se construye
+        dinámicamente.
         """
+        no_file_fields = filename is None and filepath is None and completed_at is None
+
         with lock:
-            with self._connect() as conn:
+            with self._conn() as conn:
                 c = conn.cursor()
 
+                if no_file_fields and error is None:
+                    if progress is None:
+                        c.execute(self._STMT_STATUS, (status, task_id))
+                    else:
+                        c.execute(self._STMT_PROGRESS, (status, progress, task_id))
+                    conn.commit()
+                    return
+
+                if no_file_fields and progress is None:
+                    c.execute(self._STMT_ERROR, (status, error, task_id))
+                    conn.commit()
+                    return
+
                 fields = {"status": status}
                 if progress is not None:
                     fields["progress"] = progress
@@ -205,10 +359,73 @@ class Database:
                 c.execute(f"UPDATE tasks SET {set_clause} WHERE id=?", params)
                 conn.commit()
 
+    def complete_task(
+        self,
+        task_id: int,
+        added_at: str,
+        filename: str,
+        filepath: str,
+        completed_at: str | None = None,
+    ) -> bool:
+        """
+        Marca la tarea como COMPLETED solo si sigue en curso.
+
+        Se exige que la fila continúe en DOWNLOADING y con el mismo added_at:
+        si entretanto se canceló, se reinició o la cola se vació y el id se
+        reutilizó, no se toca nada.
+
+        Returns:
+            bool: True si se actualizó la fila.
+        """
+        with lock:
+            with self._conn() as conn:
+                cur = conn.execute(
+                    """
+                    UPDATE tasks
+                    SET status=?, progress=100, filename=?, filepath=?,
+                        completed_at=COALESCE(?, completed_at)
+                    WHERE id=? AND added_at=? AND status=?
+                    """,
+                    (
+                        STATUS_COMPLETED, filename, filepath, completed_at,
+                        task_id, added_at, STATUS_DOWNLOADING,
+                    ),
+                )
+                conn.commit()
+                return cur.rowcount > 0
+
+    def update_progress(
+        self, task_id: int, progress: float, status: str = STATUS_DOWNLOADING
+    ) -> None:
+        """
+        Ruta rápida para el progreso de descarga (bucle caliente).
+        Usa directamente la sentencia fija, sin el despacho de update_status.
+        """
+        with lock:
+            with self._conn() as conn:
+                conn.execute(self._STMT_PROGRESS, (status, progress, task_id))
+
+    def update_progress_batch(self, items: list[tuple[int, float]]) -> None:
+        """
+        Actualiza el progreso de varias tareas en una sola transacción.
+
+        Args:
+            items: lista de (task_id, progress).
+        """
+        if not items:
+            return
+        with lock:
+            with self._conn() as conn:
+                conn.executemany(
+                    "UPDATE tasks SET progress=? WHERE id=?",
+                    [(pct, task_id) for task_id, pct in items],
+                )
+                conn.commit()
+
     def bump_retry(self, task_id: int) -> None:
         """Aumenta en 1 el contador de reintentos de una tarea."""
         with lock:
-            with self._connect() as conn:
+            with self._conn() as conn:
                 conn.execute(
                     "UPDATE tasks SET retry_count=retry_count+1 WHERE id=?",
                     (task_id,),
@@ -218,7 +435,7 @@ class Database:
     def reset_task(self, task_id: int) -> None:
         """Reinicia una tarea PENDING borrando progreso y errores."""
         with lock:
-            with self._connect() as conn:
+            with self._conn() as conn:
                 conn.execute(
                     """
                     UPDATE tasks
@@ -235,67 +452,88 @@ class Database:
     def delete_task(self, task_id: int) -> None:
         """Elimina una tarea por ID."""
         with lock:
-            with self._connect() as conn:
+            with self._conn() as conn:
                 conn.execute("DELETE FROM tasks WHERE id=?", (task_id,))
                 conn.commit()
 
-    def list_tasks(self, limit: int = 50, offset: int = 0):
+    def list_tasks(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        before_id: int | None = None,
+    ):
         """
         Lista tareas de forma paginada (orden DESC por id).
+
+        - before_id → paginación por cursor (keyset): devuelve las tareas
+          con id < before_id usando el índice de la PK, sin recorrer filas
+          descartadas.
+        - offset    → paginación antigua (obsoleta, se mantiene por
+          compatibilidad).
         """
+        columns = f"SELECT {', '.join(TASK_LIST_COLUMNS)} FROM tasks "
+
         with lock:
-            with self._connect() as conn:
+            with self._conn() as conn:
                 c = conn.cursor()
-                c.execute(
-                    """
-                    SELECT
-                        id, url, status, progress, source, added_at, error_msg,
-                        retry_count, completed_at, filename, filepath,
-                        local_id, source_prefix, mode
-                    FROM tasks
-                    ORDER BY id DESC
-                    LIMIT ? OFFSET ?
-                    """,
-                    (limit, offset),
-                )
+                if before_id is not None:
+                    c.execute(
+                        columns + "WHERE id < ? ORDER BY id DESC LIMIT ?",
+                        (before_id, limit),
+                    )
+                else:
+                    c.execute(
+                        columns + "ORDER BY id DESC LIMIT ? OFFSET ?",
+                        (limit, offset),
+                    )
                 return c.fetchall()
 
+    @staticmethod
+    def _next_local_id(c: sqlite3.Cursor, source: str) -> int:
+        """
+        Incrementa el contador de la fuente con un único UPSERT y devuelve
+        el nuevo valor. Se ejecuta dentro de la transacción del llamador.
+        """
+        c.execute(
+            """
+            INSERT INTO counters (source, last_local_id) VALUES (?, 1)
+            ON CONFLICT(source) DO UPDATE SET last_local_id=last_local_id+1
+            RETURNING last_local_id
+            """,
+            (source or "UNKNOWN",),
+        )
+        return c.fetchone()[0]
+
     def get_next_local_id(self, source: str) -> int:
         """
         Devuelve el próximo ID incremental por fuente.
         Si no existe registro para esa fuente, se crea comenzando en 1.
         """
         with lock:
-            with self._connect() as conn:
-                c = conn.cursor()
-                source = source or "UNKNOWN"
-
-                c.execute("SELECT last_local_id FROM counters WHERE source=?", (source,))
-                row = c.fetchone()
-
-                if row:
-                    new_id = row[0] + 1
-                    c.execute(
-                        "UPDATE counters SET last_local_id=? WHERE source=?",
-                        (new_id, source),
-                    )
-                else:
-                    new_id = 1
-                    c.execute(
-                        "INSERT INTO counters (source, last_local_id) VALUES (?, ?)",
-                        (source, new_id),
-                    )
-
+            with self._conn() as conn:
+                new_id = self._next_local_id(conn.cursor(), source)
                 conn.commit()
                 return new_id
 
+    def iter_counters(self):
+        """
+        Itera los contadores locales como tuplas (source, last_local_id),
+        ordenados por fuente (recorrido directo de la PK).
+        """
+        with lock:
+            with self._conn() as conn:
+                rows = conn.execute(
+                    "SELECT source, last_local_id FROM counters ORDER BY source"
+                ).fetchall()
+        yield from rows
+
     # ======================================================
     # 🧹 MANTENIMIENTO / LIMPIEZA
     # ======================================================
     def reset_counters(self) -> None:
         """Elimina todos los contadores locales."""
         with lock:
-            with self._connect() as conn:
+            with self._conn() as conn:
                 conn.execute("DELETE FROM counters")
                 conn.commit()
 
@@ -305,37 +543,58 @@ class Database:
         """
         Elimina todas las tareas y reinicia el AUTOINCREMENT.
         Utilizado por funciones de reinicio general.
+
+        No compacta el archivo: para eso usar vacuum_async().
         """
         with lock:
-            with self._connect() as conn:
+            with self._conn() as conn:
                 conn.execute("DELETE FROM tasks")
                 conn.execute("DELETE FROM sqlite_sequence WHERE name='tasks'")
                 conn.commit()
-                conn.execute("VACUUM")
 
         logger.info("🧨 Tabla 'tasks' vaciada y autoincrement reiniciado.")
 
+    def vacuum_async(self) -> None:
+        """
+        Lanza VACUUM en un hilo daemon, fuera del RLock de la aplicación.
+
+        Es best-effort: si la base está ocupada se registra y se omite.
+        """
+        def _vacuum():
+            try:
+                self._conn().execute("VACUUM")
+                logger.info("🧽 VACUUM completado.")
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ VACUUM omitido: {e}")
+
+        threading.Thread(target=_vacuum, daemon=True).start()
+
     def clear_all(self) -> None:
         """Elimina todas las tareas (para mantenimiento manual)."""
         with lock:
-            with self._connect() as conn:
+            with self._conn() as conn:
                 conn.execute("DELETE FROM tasks")
                 conn.commit()
 
         logger.warning("🧨 Todas las tareas han sido eliminadas de la base de datos.")
 
-    def clean_stuck_tasks(self) -> None:
+    def clean_stuck_tasks(self, exclude_ids: Iterable[int] = ()) -> None:
         """
         Marca como PENDING todas las tareas que quedaron en DOWNLOADING
         después de cierres inesperados del servidor.
+
+        `exclude_ids`: tareas que siguen ejecutándose de verdad (pool de
+        descargas) y no deben volver a la cola.
         """
+        exclude = list(exclude_ids)
+        query = "UPDATE tasks SET status=? WHERE status=?"
+        if exclude:
+            query += f" AND id NOT IN ({','.join('?' * len(exclude))})"
+
         with lock:
-            with self._connect() as conn:
+            with self._conn() as conn:
                 c = conn.cursor()
-                c.execute(
-                    "UPDATE tasks SET status=? WHERE status=?",
-                    (STATUS_PENDING, STATUS_DOWNLOADING),
-                )
+                c.execute(query, (STATUS_PENDING, STATUS_DOWNLOADING, *exclude))
                 affected = c.rowcount or 0
                 conn.commit()
 
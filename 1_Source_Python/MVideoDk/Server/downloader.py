@@ -15,14 +15,12 @@ Drivers incluidos:
     • YTDownloader      → Fallback para todo lo demás (yt-dlp)
 """
 
+import os
 from threading import Event
 from Server.downloaders.ytdlp_downloader import YTDownloader
 from Server.downloaders.douyin_downloader import DouyinDownloader
 from Server.database import Database, STATUS_ERROR
 
-# Instancia global de DB (segura para uso multihilo en tu implementación)
-db = Database()
-
 
 class Downloader:
     """
@@ -64,4 +62,70 @@ class Downloader:
 
         # Si ningún driver reconoce la URL, registrar error
         task_id = task_row[0]
-        db.update_status(task_id, STATUS_ERROR, error="No downloader available for this URL.")
+        # Caso raro: la DB se abre solo aquí (no al importar el módulo)
+        Database().update_status(
+            task_id, STATUS_ERROR, error="No downloader available for this URL."
+        )
+
+
+# ==========================================================
+# 🧩 Entrada para procesos del pool de descargas
+# ==========================================================
+_process_downloader: Downloader | None = None
+
+
+def init_process(cpus: frozenset[int] | None = None) -> None:
+    """
+    Initializer de cada proceso del pool.
+    Si hay CPUs configuradas (server.worker_cpus) fija la afinidad del
+    proceso para que no compita con el event loop de uvicorn.
+    Solo Linux: en Windows/macOS no existe sched_setaffinity → no-op.
+    """
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError:
+            pass  # CPUs fuera del cpuset permitido: se mantiene la afinidad
+
+
+class _ManagedCancelEvent:
+    """
+    Envuelve el proxy del Event del Manager.
+    Si el Manager ya no responde (cierre del servidor) la tarea se da por
+    cancelada en lugar de fallar con EOFError / FileNotFoundError.
+    """
+
+    def __init__(self, proxy):
+        self._proxy = proxy
+        self._dead = False
+
+    def _call(self, method: str, *args) -> bool:
+        if self._dead:
+            return True
+        try:
+            return getattr(self._proxy, method)(*args)
+        except (EOFError, OSError):
+            self._dead = True
+            return True
+
+    def is_set(self) -> bool:
+        return self._call("is_set")
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._call("wait", timeout)
+
+    def set(self) -> None:
+        self._call("set")
+
+
+def run_in_process(task_row, cancel_event=None) -> None:
+    """
+    Ejecuta una tarea dentro de un proceso del pool (ProcessPoolExecutor).
+    Cada proceso crea su Downloader una sola vez y lo reutiliza.
+    """
+    global _process_downloader
+    if _process_downloader is None:
+        _process_downloader = Downloader()
+    if cancel_event is not None:
+        cancel_event = _ManagedCancelEvent(cancel_event)
+    _process_downloader.run(task_row, cancel_event)
@@ -0,0 +1,152 @@
+# ================================================================
+# Server/downloaders/_shortlink_cache.py  ✅ v20 — Caché de shortlinks
+# ================================================================
+"""
+Caché de shortlinks resueltos (v.douyin.com → URL completa).
+
+Dos niveles:
+- Memoria: LRU de hasta MAX_MEMORY entradas.
+- Disco: shelve en Data/ (sobrevive a reinicios). Los procesos del pool de
+  descargas lo comparten, así que cada lectura/escritura lo abre y lo cierra
+  bajo un lock de archivo (shortlinks.cache.lock) entre procesos.
+
+Las entradas caducan a los TTL_S segundos (7 días). Solo se guardan
+resoluciones correctas: si el shortlink no se pudo resolver (se devuelve la
+misma URL) se reintentará en la próxima llamada.
+"""
+
+import shelve
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+
+# Lock de archivo entre procesos: fcntl (POSIX) o msvcrt (Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+from Core.logger import LoggerFactory
+from Core.paths import shortlink_cache_path
+
+log = LoggerFactory.get_logger("SHORTLINKS")
+
+TTL_S = 7 * 24 * 3600
+MAX_MEMORY = 1024
+
+_lock = Lock()
+_memory: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+_disk_failed = False
+
+
+# ================================================================
+# 💾 Persistencia (shelve compartido entre procesos)
+# ================================================================
+@contextmanager
+def _locked_store():
+    """
+    Abre el shelve en exclusiva (lock de archivo) y lo cierra al salir.
+    Produce None si no hay disco disponible: se trabaja solo en memoria.
+    """
+    global _disk_failed
+    if _disk_failed:
+        yield None
+        return
+
+    try:
+        path = shortlink_cache_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(path.with_name(path.name + ".lock"), "a+b")
+    except OSError as e:
+        log.warning(f"⚠️ Caché de shortlinks solo en memoria: {e}")
+        _disk_failed = True
+        yield None
+        return
+
+    with lock_file:
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        except OSError as e:
+            log.warning(f"⚠️ Lock del caché de shortlinks no disponible: {e}")
+            yield None
+            return
+
+        try:
+            try:
+                store = shelve.open(str(path))
+            except Exception as e:
+                log.warning(f"⚠️ Caché de shortlinks solo en memoria: {e}")
+                _disk_failed = True
+                yield None
+                return
+            with store:
+                yield store
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _remember(url: str, entry: tuple[str, float]) -> None:
+    _memory[url] = entry
+    _memory.move_to_end(url)
+    if len(_memory) > MAX_MEMORY:
+        _memory.popitem(last=False)
+
+
+# ================================================================
+# 🔎 Lectura / escritura
+# ================================================================
+def get(url: str) -> str | None:
+    """Devuelve la URL resuelta cacheada o None si no hay / caducó."""
+    now = time.time()
+    with _lock:
+        entry = _memory.get(url)
+        if entry is None:
+            try:
+                with _locked_store() as store:
+                    entry = store.get(url) if store is not None else None
+            except Exception:
+                entry = None
+
+        if entry is None:
+            return None
+
+        # Entradas corruptas o de un formato anterior cuentan como fallo
+        try:
+            resolved, ts = entry
+            expired = now - float(ts) > TTL_S
+        except (TypeError, ValueError):
+            _memory.pop(url, None)
+            return None
+
+        if expired or not isinstance(resolved, str):
+            _memory.pop(url, None)
+            return None
+
+        _remember(url, (resolved, float(ts)))
+        return resolved
+
+
+def put(url: str, resolved: str) -> None:
+    """Guarda una resolución correcta en memoria y disco."""
+    entry = (resolved, time.time())
+    with _lock:
+        _remember(url, entry)
+        try:
+            with _locked_store() as store:
+                if store is not None:
+                    store[url] = entry
+        except Exception as e:
+            log.warning(f"⚠️ No se pudo persistir shortlink: {e}")
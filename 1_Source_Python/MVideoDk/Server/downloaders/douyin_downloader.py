@@ -9,18 +9,26 @@ Características v20:
 - Extracción de metadata AWEME desde tráfico de red.
 - Descarga con barra de progreso y soporte para cancelación.
 - Manejo completo de errores y actualización en base de datos.
-- Post-procesado integrado mediante `process_file`.
+- Post-procesado integrado mediante `process_file` (cancelable).
 
 NOTA: No se ha modificado ninguna lógica funcional respecto a la v9/v5,
 solo limpieza profunda, documentación profesional y organización por secciones.
 """
 
+import atexit
+import os
 import re
+import shutil
+import socket
+import time
 from pathlib import Path
 from typing import Optional, Dict
 import requests
-from threading import Event
-from playwright.sync_api import sync_playwright
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+from contextlib import contextmanager
+from threading import Event, Lock, Thread, get_ident
 
 from Core.paths import chromium_dir, chromium_executable
 from Core.logger import LoggerFactory
@@ -30,23 +38,61 @@ from Core.app_config import AppConfig
 from Server.database import (
     Database,
     STATUS_DOWNLOADING,
-    STATUS_COMPLETED,
     STATUS_ERROR,
     STATUS_CANCELLED,
 )
 from Server.downloaders.post_processor import process_file
+from Server.downloaders import _shortlink_cache
 
 
 # ================================================================
 # 🔧 Configuración
 # ================================================================
 HEADLESS = True
+AWEME_WAIT_MS = 5500  # tope de espera del JSON AWEME tras cargar la página
+AWEME_POLL_MS = 100
 UA = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
     "Chrome/127.0.0.0 Safari/537.36"
 )
-CHUNK = 1024 * 256  # 256 KB
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB por lectura en la descarga del MP4
+PROGRESS_POLL_S = 0.5  # cada cuánto el hilo de progreso consulta los bytes
+PROGRESS_MIN_STEP = 5.0  # % mínimo entre dos escrituras de progreso en DB
+CANCEL_POLL_S = 0.1  # el watchdog de cancelación termina como mucho 0.1 s tras la descarga
+MP4_CONNECT_TIMEOUT_S = 20
+MP4_READ_TIMEOUT_S = 20  # también acota la cancelación con el servidor parado
+
+class _SocketTunedAdapter(HTTPAdapter):
+    """HTTPAdapter con TCP_NODELAY (por defecto en urllib3) + SO_KEEPALIVE."""
+
+    SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = self.SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+# Sesión HTTP única del módulo (shortlinks + CDN de MP4): reutiliza TCP/TLS
+_SESSION = requests.Session()
+_SESSION.headers["User-Agent"] = UA
+_ADAPTER = _SocketTunedAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[500, 502, 503, 504],
+    ),
+)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+
+# Caracteres no válidos en nombres de archivo (Windows)
+_FN_BAD = re.compile(r'[\\/:*?"<>|]')
 
 
 # ================================================================
@@ -70,33 +116,141 @@ def clean(text: str) -> str:
     """Limpia cadenas para usarlas como nombre de archivo seguro."""
     if not text:
         return "video"
-    text = re.sub(r"[\\/:*?\"<>|]", "_", text.strip())
-    return text[:150] or "video"
+    return _FN_BAD.sub("_", text.strip())[:150] or "video"
 
 
-def pick_aweme(data: Dict):
-    """Extrae el objeto AWEME desde distintas estructuras posibles."""
-    if not isinstance(data, dict):
-        return None
+class DownloadCancelled(Exception):
+    """Se lanza desde la lectura del stream cuando el usuario cancela."""
+
+
+class CancellableRawWrapper:
+    """
+    Envuelve `response.raw` para usarlo con shutil.copyfileobj:
+    - Antes de cada lectura comprueba `cancel_event`.
+    - Acumula los bytes leídos en `bytes_read` (lo consulta el hilo de progreso).
+    """
+
+    def __init__(self, raw, cancel_event: Event | None = None):
+        self.raw = raw
+        self.cancel_event = cancel_event
+        self.bytes_read = 0
 
-    if "aweme_detail" in data:
-        return data["aweme_detail"]
+    def read(self, size: int = -1) -> bytes:
+        if self.cancel_event and self.cancel_event.is_set():
+            raise DownloadCancelled()
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        return data
 
-    if "aweme_list" in data and data["aweme_list"]:
-        return data["aweme_list"][0]
 
-    if "aweme" in data:
-        return data["aweme"]
+def pick_aweme(data: Dict):
+    """
+    Extrae el objeto AWEME desde distintas estructuras posibles.
+    Desciende por "item" (o si no, "data") de forma iterativa.
+    """
+    while isinstance(data, dict):
+        if "aweme_detail" in data:
+            return data["aweme_detail"]
 
-    if "item" in data:
-        return pick_aweme(data["item"])
+        aweme_list = data.get("aweme_list")
+        if aweme_list:
+            return aweme_list[0]
 
-    if "data" in data:
-        return pick_aweme(data["data"])
+        if "aweme" in data:
+            return data["aweme"]
+
+        for key in ("item", "data"):
+            if key in data:
+                data = data[key]
+                break
+        else:
+            return None
 
     return None
 
 
+# ================================================================
+# 🌐 Pool de navegador Playwright (Chromium reutilizado)
+# ================================================================
+class DouyinBrowserPool:
+    """
+    Mantiene un único Chromium abierto entre descargas.
+
+    - Cada uso abre un context nuevo (barato) y lo cierra al terminar.
+    - La API sync de Playwright está ligada al hilo que la arrancó: si se
+      pide desde otro hilo se usa un navegador temporal (comportamiento previo).
+    - El navegador se cierra en atexit.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._pw = None
+        self._browser = None
+        self._owner: int | None = None
+
+    def _launch(self, pw):
+        return pw.chromium.launch(
+            headless=HEADLESS,
+            executable_path=get_chromium_path(),
+        )
+
+    def _ensure_browser(self):
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+
+        from playwright.sync_api import sync_playwright
+
+        if self._pw is None:
+            self._pw = sync_playwright().start()
+            self._owner = get_ident()
+        self._browser = self._launch(self._pw)
+        return self._browser
+
+    @contextmanager
+    def context(self, **kwargs):
+        """Context Playwright listo para usar; se cierra al salir."""
+        with self._lock:
+            if self._owner is not None and self._owner != get_ident():
+                # Otro hilo: navegador de un solo uso
+                from playwright.sync_api import sync_playwright
+
+                with sync_playwright() as pw:
+                    browser = self._launch(pw)
+                    try:
+                        yield browser.new_context(user_agent=UA, **kwargs)
+                    finally:
+                        browser.close()
+                return
+
+            ctx = self._ensure_browser().new_context(user_agent=UA, **kwargs)
+            try:
+                yield ctx
+            finally:
+                try:
+                    ctx.close()
+                except Exception:
+                    pass
+
+    def shutdown(self) -> None:
+        """Cierra navegador y driver de Playwright."""
+        with self._lock:
+            try:
+                if self._browser is not None:
+                    self._browser.close()
+                if self._pw is not None:
+                    self._pw.stop()
+            except Exception:
+                pass  # al salir del proceso el driver se cierra igualmente
+            finally:
+                self._browser = None
+                self._pw = None
+                self._owner = None
+
+
+_BROWSER_POOL = DouyinBrowserPool()
+atexit.register(_BROWSER_POOL.shutdown)
+
+
 # ================================================================
 # 🔗 Resolver Shortlink (rápido + fallback Playwright)
 # ================================================================
@@ -106,39 +260,41 @@ def resolve_shortlink(url: str, logger):
     Fases:
         1. Intento rápido con requests (sin redirección automática).
         2. Fallback: abrir shortlink con Playwright.
+    Las resoluciones correctas se cachean 7 días (ver _shortlink_cache).
     """
     if "v.douyin.com" not in url.lower():
         return url
 
+    cached = _shortlink_cache.get(url)
+    if cached:
+        logger.info(f"Douyin: shortlink resuelto a {cached} (caché)")
+        return cached
+
     # Método rápido
     try:
         logger.info(f"Douyin: resolviendo shortlink (rápido) {url}")
-        r = requests.get(url, allow_redirects=False, timeout=8)
+        r = _SESSION.get(url, allow_redirects=False, timeout=8)
         loc = r.headers.get("Location")
         if loc:
             logger.info(f"Douyin: shortlink resuelto a {loc} (rápido)")
+            _shortlink_cache.put(url, loc)
             return loc
     except Exception as e:
         logger.warning(f"Douyin: método rápido falló ({e})")
 
-    # Fallback con Playwright
+    # Fallback con Playwright (navegador compartido del pool)
     try:
-        chromium_path = get_chromium_path()
         logger.info(f"Douyin: resolviendo shortlink con Playwright {url}")
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=HEADLESS,
-                executable_path=chromium_path,
-            )
-            ctx = browser.new_context(user_agent=UA)
+        with _BROWSER_POOL.context() as ctx:
             page = ctx.new_page()
             page.goto(url, timeout=60000, wait_until="domcontentloaded")
             final = page.url
-            browser.close()
 
-            logger.info(f"Douyin: shortlink resuelto a {final} (fallback)")
-            return final
+        logger.info(f"Douyin: shortlink resuelto a {final} (fallback)")
+        if final and final != url:
+            _shortlink_cache.put(url, final)
+        return final
 
     except Exception as e:
         logger.warning(f"Douyin: fallback Playwright falló ({e})")
@@ -152,49 +308,75 @@ def resolve_shortlink(url: str, logger):
 def extract_aweme_from_network(url: str, logger) -> Optional[dict]:
     """
     Abre la página con Playwright, captura respuestas y busca la metadata AWEME.
+    Corre en el proceso del pool de descargas, con el mismo Chromium
+    (_BROWSER_POOL) que el fallback de resolve_shortlink.
     """
     container = {"aweme": None}
+    found = Event()
 
-    chromium_path = get_chromium_path()
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=HEADLESS,
-            executable_path=chromium_path,
-        )
-        ctx = browser.new_context(
-            user_agent=UA,
-            java_script_enabled=True,
-        )
-        page = ctx.new_page()
-
-        def on_response(resp):
-            if container["aweme"] is not None:
-                return
-            if "detail" not in resp.url:
-                return
-            try:
-                data = resp.json()
-            except Exception:
-                return
-            aw = pick_aweme(data)
-            if aw:
-                container["aweme"] = aw
+    def on_response(resp):
+        if container["aweme"] is not None:
+            return
+        if "detail" not in resp.url:
+            return
+        try:
+            data = resp.json()
+        except Exception:
+            return
+        aw = pick_aweme(data)
+        if aw:
+            container["aweme"] = aw
+            found.set()
 
-        ctx.on("response", on_response)
+    try:
+        with _BROWSER_POOL.context(java_script_enabled=True) as ctx:
+            page = ctx.new_page()
+            ctx.on("response", on_response)
 
-        try:
             logger.info(f"Douyin: abriendo página {url}")
             page.goto(url, timeout=60000)
-            page.wait_for_timeout(5500)
-        except Exception as e:
-            logger.warning(f"Douyin: error cargando página: {e}")
-        finally:
-            browser.close()
+
+            # Espera hasta capturar el AWEME (máx. AWEME_WAIT_MS). Las esperas
+            # cortas de Playwright siguen despachando los eventos "response".
+            deadline = time.monotonic() + AWEME_WAIT_MS / 1000
+            while not found.is_set():
+                remaining_ms = (deadline - time.monotonic()) * 1000
+                if remaining_ms <= 0:
+                    break
+                page.wait_for_timeout(min(AWEME_POLL_MS, remaining_ms))
+    except Exception as e:
+        logger.warning(f"Douyin: error cargando página: {e}")
 
     return container["aweme"]
 
 
+def _abort_response(r) -> None:
+    """
+    Corta una respuesta en streaming desde otro hilo (solo API pública).
+    HTTPResponse.shutdown() (urllib3 >= 2.3) cierra el socket sin esperar
+    al lock del lector: un recv() bloqueado vuelve en el acto y
+    CancellableRawWrapper lanza DownloadCancelled. No se devuelve la
+    conexión al pool: está a medio leer.
+    """
+    shutdown = getattr(r.raw, "shutdown", None)
+    if shutdown is not None:
+        try:
+            shutdown()
+        except Exception:
+            pass
+    r.close()
+
+
+def _preallocate(f, size: int) -> None:
+    """Reserva el tamaño final del archivo (solo POSIX; evita fragmentación)."""
+    if size <= 0 or not hasattr(os, "posix_fallocate"):
+        return
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+    except OSError:
+        pass  # FS sin soporte: se escribe de forma normal
+
+
 # ================================================================
 # 🎬 Downloader Douyin
 # ================================================================
@@ -225,35 +407,61 @@ class DouyinDownloader:
             100%     → Final
         """
         try:
-            with requests.get(mp4_url, stream=True, timeout=20) as r:
+            with _SESSION.get(
+                mp4_url, stream=True, timeout=(MP4_CONNECT_TIMEOUT_S, MP4_READ_TIMEOUT_S)
+            ) as r:
                 if r.status_code != 200:
                     return False, f"HTTP {r.status_code}"
 
                 total = int(r.headers.get("content-length") or 0)
                 out.parent.mkdir(parents=True, exist_ok=True)
 
-                downloaded = 0
-                last_report = 20.0  # arranca desde 20%
+                # Copia en bloques de 1 MB directamente desde el socket (en C)
+                r.raw.decode_content = True
+                src = CancellableRawWrapper(r.raw, cancel_event)
+                done = Event()
 
-                with open(out, "wb") as f:
-                    for chunk in r.iter_content(CHUNK):
-
-                        if cancel_event and cancel_event.is_set():
-                            return False, "Cancelled by user"
-
-                        if not chunk:
+                def watch() -> None:
+                    """Hilo de progreso: informa a la DB cada PROGRESS_POLL_S."""
+                    last_report = 20.0  # arranca desde 20%
+                    while not done.wait(PROGRESS_POLL_S):
+                        if total <= 0:
                             continue
-
-                        f.write(chunk)
-                        downloaded += len(chunk)
-
-                        if total > 0:
-                            pct = 20 + (downloaded / total) * 80
-                            pct = min(pct, 99)
-
-                            if pct - last_report >= 1:
-                                self.db.update_status(task_id, STATUS_DOWNLOADING, pct)
-                                last_report = pct
+                        pct = min(20 + (src.bytes_read / total) * 80, 99)
+                        if pct - last_report >= PROGRESS_MIN_STEP:
+                            self.db.update_progress(task_id, pct)
+                            last_report = pct
+
+                def cancel_watchdog() -> None:
+                    """Cierra el socket en cuanto se cancela (corta la lectura en curso)."""
+                    while not done.is_set():
+                        if cancel_event.wait(CANCEL_POLL_S):
+                            _abort_response(r)
+                            return
+
+                watcher = Thread(target=watch, name="DouyinProgress", daemon=True)
+                watcher.start()
+                if cancel_event is not None:
+                    Thread(target=cancel_watchdog, name="DouyinCancel", daemon=True).start()
+
+                try:
+                    with open(out, "wb") as f:
+                        _preallocate(f, total)
+                        shutil.copyfileobj(src, f, length=DOWNLOAD_CHUNK_SIZE)
+                except DownloadCancelled:
+                    return False, "Cancelled by user"
+                except Exception:
+                    if cancel_event and cancel_event.is_set():
+                        return False, "Cancelled by user"
+                    raise
+                finally:
+                    done.set()
+                    watcher.join()
+
+                # r.close() puede cortar el stream como un EOF prematuro
+                truncated = total <= 0 or src.bytes_read < total
+                if cancel_event and cancel_event.is_set() and truncated:
+                    return False, "Cancelled by user"
 
                 return True, None
 
@@ -351,17 +559,26 @@ class DouyinDownloader:
                 return
 
             # 5) Postprocesado (audio u otros)
-            final_path = process_file(str(mp4_path)) or mp4_path
-            final_path = Path(final_path)
+            final_path = process_file(
+                mp4_path, check_exists=False, cancel_event=cancel_event
+            )
+            if final_path is None:
+                self.db.update_status(
+                    task_id, STATUS_CANCELLED, error="Cancelled by user"
+                )
+                return
 
-            # 6) Finalizar y actualizar DB
-            self.db.update_status(
+            # 6) Finalizar y actualizar DB (solo si la tarea sigue en curso)
+            if not self.db.complete_task(
                 task_id,
-                STATUS_COMPLETED,
-                100,
+                add_at,
                 filename=final_path.name,
                 filepath=str(final_path),
-            )
+            ):
+                self.logger.warning(
+                    f"Douyin: #{task_id} ya no está en curso; no se marca COMPLETED"
+                )
+                return
 
             self.logger.info(
                 f"Douyin: ✅ Descarga completada #{task_id}: {final_path.name}"
@@ -20,9 +20,14 @@ El módulo:
 - Valida presencia de ffmpeg y ffprobe.
 - Ejecuta ffmpeg con parámetros adecuados al formato.
 - Maneja errores y logs de manera clara.
+- Se ejecuta en línea dentro del proceso de descarga (la tarea conserva
+  su hueco del pool hasta terminar) y termina ffmpeg si se cancela.
 """
 
 import subprocess
+import threading
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
 
 from Core.logger import LoggerFactory
@@ -36,6 +41,14 @@ log = LoggerFactory.get_logger("POSTPROCESS")
 
 FFMPEG_BIN = ffmpeg_dir() / "ffmpeg.exe"
 FFPROBE_BIN = ffmpeg_dir() / "ffprobe.exe"
+STDERR_TAIL_LINES = 20  # líneas finales de stderr que se guardan para el log
+CANCEL_POLL_S = 0.5  # cada cuánto se mira la señal de cancelación durante ffmpeg
+
+# Códecs de origen que se copian sin recodificar, por formato de salida
+_COPY_CODECS = {
+    "m4a": frozenset({"aac", "mp4a"}),
+    "flac": frozenset({"flac"}),
+}
 
 
 # ================================================================
@@ -53,10 +66,84 @@ def _check_ffmpeg():
         raise RuntimeError(f"ffprobe no encontrado: {FFPROBE_BIN}")
 
 
+def _probe_audio_codec(path: Path) -> str | None:
+    """Devuelve el códec de la primera pista de audio (o None si falla)."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return _probe_audio_codec_cached(str(path), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=256)
+def _probe_audio_codec_cached(path: str, mtime_ns: int, size: int) -> str | None:
+    """ffprobe cacheado por (ruta, mtime, tamaño)."""
+    try:
+        proc = subprocess.run(
+            [
+                str(FFPROBE_BIN),
+                "-v", "error",
+                "-select_streams", "a:0",
+                "-show_entries", "stream=codec_name",
+                "-of", "csv=p=0",
+                path,
+            ],
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="ignore",
+            timeout=15,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        log.warning(f"⚠️ ffprobe falló: {e}")
+        return None
+
+    if proc.returncode != 0:
+        return None
+    return proc.stdout.strip().lower() or None
+
+
+def _run_ffmpeg(cmd: list[str], cancel_event=None) -> tuple[int, str]:
+    """
+    Ejecuta ffmpeg descartando stdout y leyendo stderr línea a línea.
+    Solo se conservan las últimas STDERR_TAIL_LINES líneas (memoria acotada).
+    Si se activa `cancel_event`, ffmpeg se termina.
+
+    Returns:
+        (returncode, últimas líneas de stderr)
+    """
+    tail: deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+    with subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="ignore",
+    ) as proc:
+        if cancel_event is not None:
+
+            def watch() -> None:
+                while proc.poll() is None:
+                    if cancel_event.wait(CANCEL_POLL_S):
+                        proc.terminate()
+                        return
+
+            threading.Thread(target=watch, name="FFmpegCancel", daemon=True).start()
+
+        for line in proc.stderr:
+            tail.append(line)
+    return proc.returncode, "".join(tail)
+
+
 # ================================================================
 # 🎧 PROCESAMIENTO PRINCIPAL
 # ================================================================
-def process_file(input_path: str) -> Path:
+def process_file(
+    input_path: Path, check_exists: bool = True, cancel_event=None
+) -> Path | None:
     """
     Procesa un archivo descargado según configuración del usuario.
 
@@ -66,10 +153,13 @@ def process_file(input_path: str) -> Path:
       action  = both  → genera audio y conserva el video.
 
     Args:
-        input_path (str): Ruta absoluta al archivo original.
+        input_path (Path): Ruta absoluta al archivo original (se acepta str).
+        check_exists (bool): False si el llamador acaba de escribir el archivo.
+        cancel_event: señal de cancelación de la tarea (termina ffmpeg).
 
     Returns:
-        Path: Ruta del archivo final (audio o video según modo).
+        Path | None: Ruta del archivo final (audio o video según modo),
+        o None si la tarea se canceló durante ffmpeg.
     """
     cfg = AppConfig()
 
@@ -78,7 +168,8 @@ def process_file(input_path: str) -> Path:
     audio_format = cfg.get("postprocess", "audio_format", fallback="mp3").lower()
     bitrate = cfg.get("postprocess", "audio_bitrate", fallback="320k")
 
-    input_path = Path(input_path)
+    if not isinstance(input_path, Path):
+        input_path = Path(input_path)
 
     # ---------------------------------------------------------
     # 🔕 POSTPROCESADO DESACTIVADO
@@ -94,7 +185,7 @@ def process_file(input_path: str) -> Path:
         log.warning(f"⚠️ Acción '{action}' inválida. Se deja el archivo original.")
         return input_path
 
-    if not input_path.exists():
+    if check_exists and not input_path.exists():
         log.error(f"❌ Archivo no encontrado: {input_path}")
         return input_path
 
@@ -121,14 +212,26 @@ def process_file(input_path: str) -> Path:
     cmd = [
         str(FFMPEG_BIN),
         "-y",
+        "-nostdin",  # sin lecturas de terminal
+        "-threads", "0",  # ffmpeg elige el paralelismo
         "-i", str(input_path),
         "-vn",  # eliminar video, sólo audio
+        "-map", "0:a:0",  # solo se decodifica la primera pista de audio
+        "-map_metadata", "-1",
     ]
 
-    if audio_format == "mp3":
+    src_codec = _probe_audio_codec(input_path) if audio_format in _COPY_CODECS else None
+
+    if src_codec and src_codec in _COPY_CODECS[audio_format]:
+        # El audio ya está en el códec destino: copia directa sin recodificar
+        log.info(f"   Audio de origen '{src_codec}' → copia sin recodificar")
+        cmd += ["-c:a", "copy"]
+        if audio_format == "m4a":
+            cmd += ["-movflags", "+faststart"]
+    elif audio_format == "mp3":
         cmd += ["-acodec", "libmp3lame", "-b:a", bitrate]
     elif audio_format == "m4a":
-        cmd += ["-c:a", "aac", "-b:a", bitrate]
+        cmd += ["-c:a", "aac", "-b:a", bitrate, "-movflags", "+faststart"]
     elif audio_format == "flac":
         cmd += ["-c:a", "flac"]
     elif audio_format == "wav":
@@ -143,17 +246,15 @@ def process_file(input_path: str) -> Path:
     # ▶️ Ejecutar FFmpeg
     # ---------------------------------------------------------
     try:
-        proc = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            encoding="utf-8",
-            errors="ignore",
-        )
+        returncode, stderr_tail = _run_ffmpeg(cmd, cancel_event)
+
+        if cancel_event is not None and cancel_event.is_set():
+            log.info(f"⛔ Post-procesado cancelado: {input_path.name}")
+            output_path.unlink(missing_ok=True)  # salida a medias
+            return None
 
-        if proc.returncode != 0:
-            log.error(f"❌ FFmpeg falló:\n{proc.stderr[-300:]}")
+        if returncode != 0:
+            log.error(f"❌ FFmpeg falló:\n{stderr_tail[-300:]}")
             return input_path
 
     except Exception as e:
@@ -177,3 +278,4 @@ def process_file(input_path: str) -> Path:
     if action == "both":
         # se deja el video, pero se retorna la ruta del video como archivo final
         return input_path
+
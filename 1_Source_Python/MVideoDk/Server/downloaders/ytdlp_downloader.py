@@ -20,6 +20,8 @@ Flujo principal:
 7. Actualización en base de datos
 """
 
+import os
+import re
 import subprocess
 import time
 from threading import Event
@@ -33,14 +35,19 @@ from Core.app_config import AppConfig
 
 from Server.database import (
     Database,
+    ProgressBuffer,
     STATUS_DOWNLOADING,
-    STATUS_COMPLETED,
     STATUS_ERROR,
     STATUS_CANCELLED,
 )
 
 from Server.downloaders.post_processor import process_file
 
+# Lectura de stdout en bloques binarios (sin decodificar línea a línea)
+READ_BLOCK = 65536
+_PCT_RE = re.compile(rb"(\d+(?:\.\d+)?)%")  # "54.3%" y también "100%"
+_DEST_RE = re.compile(rb"Destination:\s*(.+?)\s*$", re.MULTILINE)
+
 
 # ================================================================
 # 🧩 Clase principal
@@ -69,6 +76,39 @@ class YTDownloader:
         """yt-dlp soporta prácticamente cualquier URL."""
         return True
 
+    # ============================================================
+    # 🔎 Búsqueda del archivo generado
+    # ============================================================
+    @staticmethod
+    def _scan_outputs(task_dir: Path, display_id, since: float):
+        """
+        Recorre task_dir una vez con os.scandir (stat ya incluido en la
+        entrada del directorio) y devuelve:
+            (más reciente con "[ID<display_id>]." en el nombre,
+             más reciente modificado desde `since`)
+        """
+        marker = f" [ID{display_id}]."
+        best_id = best_recent = None
+        best_id_mtime = best_recent_mtime = float("-inf")
+
+        try:
+            with os.scandir(task_dir) as it:
+                for entry in it:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    mtime = entry.stat(follow_symlinks=False).st_mtime
+                    if marker in entry.name and mtime > best_id_mtime:
+                        best_id, best_id_mtime = entry.path, mtime
+                    if mtime >= since and mtime > best_recent_mtime:
+                        best_recent, best_recent_mtime = entry.path, mtime
+        except OSError:
+            return None, None
+
+        return (
+            Path(best_id) if best_id else None,
+            Path(best_recent) if best_recent else None,
+        )
+
     # ============================================================
     # ▶️ RUN — flujo principal del downloader
     # ============================================================
@@ -144,6 +184,7 @@ class YTDownloader:
         # ============================================================
         detected_path = None
         start_time = time.time()
+        process = None
 
         try:
             self.logger.info(f"▶️ Ejecutando: {' '.join(cmd)}")
@@ -152,61 +193,64 @@ class YTDownloader:
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
-                encoding="utf-8",
-                errors="ignore",
+                bufsize=0,
             )
 
-            last_update = 0
+            # Progreso agrupado: como mucho una escritura por segundo
+            progress_buf = ProgressBuffer(self.db, interval=1.0)
+
+            def handle_block(block: bytes) -> None:
+                """Procesa un bloque de líneas completas de stdout."""
+                nonlocal detected_path
+
+                # Detectar destino real (archivo generado)
+                for m in _DEST_RE.finditer(block):
+                    dest = m.group(1).decode("utf-8", "ignore").strip()
+                    if not dest:
+                        continue
+                    p = Path(dest)
+                    if not p.is_absolute():
+                        p = task_dir / p
+                    detected_path = p
+                    self.logger.info(f"Destino detectado: {p}")
+
+                # Progreso: basta con el último "54.3%" del bloque
+                pcts = _PCT_RE.findall(block)
+                if pcts:
+                    progress_buf.push(task_id, float(pcts[-1]))
+
+            fd = process.stdout.fileno()
+            pending = b""
 
             while True:
                 # Cancelación desde GUI
                 if cancel_event and cancel_event.is_set():
                     process.terminate()
+                    progress_buf.flush()
                     self.db.update_status(task_id, STATUS_CANCELLED, error="Cancelled")
                     return
 
-                line = process.stdout.readline() if process.stdout else ""
-                if not line and process.poll() is not None:
-                    break
-                if not line:
-                    continue
+                data = os.read(fd, READ_BLOCK)
+                if not data:
+                    break  # EOF: yt-dlp cerró stdout
 
-                line = line.strip()
+                # Solo se procesan líneas completas; el resto queda pendiente
+                block, sep, rest = (pending + data).rpartition(b"\n")
+                if not sep:
+                    pending = rest
+                    continue
+                pending = rest
+                handle_block(block)
 
-                # ------------------------------------------------------
-                # Detectar destino real (archivo generado)
-                # ------------------------------------------------------
-                if "Destination:" in line:
-                    try:
-                        dest = line.split("Destination:", 1)[1].strip()
-                        p = Path(dest)
-                        if not p.is_absolute():
-                            p = task_dir / p
-                        detected_path = p
-                        self.logger.info(f"Destino detectado: {p}")
-                    except Exception:
-                        pass
-
-                # ------------------------------------------------------
-                # Progreso: buscar tokens tipo "54.3%"
-                # ------------------------------------------------------
-                for token in line.split():
-                    if token.endswith("%"):
-                        try:
-                            pct = float(token[:-1])
-                            now = time.time()
-                            if now - last_update > 1:
-                                self.db.update_status(task_id, STATUS_DOWNLOADING, pct)
-                                last_update = now
-                        except Exception:
-                            pass
+            if pending:
+                handle_block(pending)
 
+            progress_buf.flush()
             process.wait()
 
             # Capturar stderr
             try:
-                stderr_text = process.stderr.read() or ""
+                stderr_text = (process.stderr.read() or b"").decode("utf-8", "ignore")
             except Exception:
                 stderr_text = ""
 
@@ -220,36 +264,36 @@ class YTDownloader:
                 candidate = detected_path
 
             else:
-                # 2) Buscar archivos con el ID
-                for p in task_dir.glob(f"* [ID{display_id}].*"):
-                    if candidate is None or p.stat().st_mtime > candidate.stat().st_mtime:
-                        candidate = p
+                # 2) Archivo con el ID / 3) archivo reciente: una sola pasada
+                by_id, recent = self._scan_outputs(task_dir, display_id, start_time - 3)
+                candidate = by_id
 
                 # 3) Fallback: archivo reciente si yt-dlp terminó OK
-                if candidate is None and process.returncode == 0:
-                    recent = [
-                        p for p in task_dir.glob("*")
-                        if p.is_file() and p.stat().st_mtime >= start_time - 3
-                    ]
-                    if recent:
-                        candidate = max(recent, key=lambda p: p.stat().st_mtime)
-                        self.logger.warning(f"Archivo adoptado: {candidate}")
+                if candidate is None and process.returncode == 0 and recent:
+                    candidate = recent
+                    self.logger.warning(f"Archivo adoptado: {candidate}")
 
             # ============================================================
             # ✔️ POST-PROCESADO + ACTUALIZACIÓN DB
             # ============================================================
             if candidate:
-                final_path = process_file(str(candidate)) or candidate
-                final_path = Path(final_path)
+                final_path = process_file(
+                    candidate, check_exists=False, cancel_event=cancel_event
+                )
+                if final_path is None:
+                    self.logger.info(f"⛔ Post-procesado cancelado #{task_id}")
+                    self.db.update_status(task_id, STATUS_CANCELLED, error="Cancelled")
+                    return
 
-                self.db.update_status(
+                if not self.db.complete_task(
                     task_id,
-                    STATUS_COMPLETED,
-                    100.0,
+                    added_at,
                     filename=final_path.name,
                     filepath=str(final_path),
                     completed_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                )
+                ):
+                    self.logger.warning(f"#{task_id} ya no está en curso: no se completa")
+                    return
 
                 self.logger.info(f"✅ Descarga completada #{task_id}: {final_path.name}")
                 return
@@ -269,3 +313,13 @@ class YTDownloader:
         except Exception as e:
             self.db.update_status(task_id, STATUS_ERROR, error=str(e))
             self.logger.error(f"⚠️ Excepción en #{task_id}: {e}")
+
+        finally:
+            # Nunca dejar yt-dlp huérfano (cancelación o error a mitad)
+            if process is not None and process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
@@ -8,6 +8,7 @@ Responsabilidades:
 - Gestionar el token del servidor (archivo configurable).
 - Crear un token si no existe o está vacío.
 - Verificar tokens entrantes (Bearer) mediante comparación segura.
+- Dependencia FastAPI `auth_required` común a todas las rutas.
 - Generar hashing SHA256 para exponer un identificador seguro.
 
 Este módulo es utilizado por:
@@ -16,17 +17,40 @@ Este módulo es utilizado por:
 - GUI
 """
 
-import os
 import hmac
 import hashlib
+import secrets
+import threading
+import time
 from pathlib import Path
 
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
 from Core.paths import token_path as default_token_path
 from Core.logger import LoggerFactory
 from Core.app_config import AppConfig
 
 logger = LoggerFactory.get_logger("SECURITY")
 
+# Token en memoria; se invalida cuando cambia la ruta o el mtime del archivo
+_cached = {"token": None, "path": None, "mtime": 0, "digest": None}
+_cache_lock = threading.Lock()
+
+# Caché TTL de tokens ya verificados: SHA256(token) → instante de caducidad.
+# Solo se guardan aciertos; se vacía cuando el token del servidor cambia.
+AUTH_CACHE_TTL = AppConfig().getfloat("server", "auth_cache_ttl", fallback=60.0)
+AUTH_CACHE_MAX = 1024
+_auth_cache: dict[bytes, float] = {}
+_auth_cache_lock = threading.Lock()
+
+bearer = HTTPBearer()  # Esquema Bearer compartido (Swagger / Authorize)
+
+
+def _clear_auth_cache() -> None:
+    with _auth_cache_lock:
+        _auth_cache.clear()
+
 
 # ----------------------------------------------------------
 # 📌 Ruta del archivo de token
@@ -64,8 +88,9 @@ def create_token() -> str:
     try:
         token_file.parent.mkdir(parents=True, exist_ok=True)
 
-        token = os.urandom(16).hex()
+        token = secrets.token_hex(32)  # 256 bits
         token_file.write_text(token, encoding="utf-8")
+        _clear_auth_cache()  # los tokens anteriores dejan de valer ya
 
         logger.info(f"🔑 Token generado en: {token_file}")
         return token
@@ -82,27 +107,49 @@ def get_token() -> str:
     """
     Obtiene el token actual. Si no existe o está vacío, lo recrea.
 
+    El contenido se cachea en memoria: mientras el mtime del archivo no
+    cambie, solo se hace un stat() por llamada.
+
     Returns:
         str: Token del servidor.
     """
     token_file = _get_token_file()
 
-    if not token_file.exists():
-        return create_token()
-
     try:
-        token = token_file.read_text(encoding="utf-8").strip()
+        mtime = token_file.stat().st_mtime_ns
+    except OSError:
+        return create_token()
 
-        if not token:
-            logger.warning("Archivo de token vacío — regenerando token...")
+    with _cache_lock:
+        if (
+            _cached["token"]
+            and _cached["path"] == token_file
+            and _cached["mtime"] == mtime
+        ):
+            return _cached["token"]
+
+        try:
+            token = token_file.read_text(encoding="utf-8").strip()
+
+            if not token:
+                logger.warning("Archivo de token vacío — regenerando token...")
+                return create_token()
+
+            if _cached["token"] is not None and _cached["token"] != token:
+                _clear_auth_cache()  # token rotado en disco
+
+            _cached.update(
+                token=token,
+                path=token_file,
+                mtime=mtime,
+                digest=hashlib.sha256(token.encode("utf-8")).hexdigest(),
+            )
+            return token
+
+        except Exception as e:
+            logger.error(f"Error al leer token: {e}")
             return create_token()
 
-        return token
-
-    except Exception as e:
-        logger.error(f"Error al leer token: {e}")
-        return create_token()
-
 
 # ----------------------------------------------------------
 # 🧠 Digest SHA256
@@ -114,8 +161,10 @@ def get_token_digest() -> str:
     Returns:
         str: Digest en hexadecimal.
     """
-    token = get_token().encode("utf-8")
-    return hashlib.sha256(token).hexdigest()
+    token = get_token()
+    if _cached["token"] == token and _cached["digest"]:
+        return _cached["digest"]  # calculado al cargar el token
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
 
 # ----------------------------------------------------------
@@ -126,6 +175,9 @@ def verify_token(token: str) -> bool:
     Compara el token recibido con el token del servidor.
 
     Utiliza hmac.compare_digest → seguro ante ataques de tiempo.
+    Se compara SHA256(token recibido) con el digest del token del servidor,
+    calculado una sola vez al cargarlo (get_token lo cachea por mtime).
+    No se guarda ningún resultado: los tokens inválidos no ocupan caché.
 
     Args:
         token (str): Token recibido (Authorization: Bearer ...)
@@ -134,8 +186,9 @@ def verify_token(token: str) -> bool:
         bool: True si coincide, False si no.
     """
     try:
-        expected = get_token()
-        is_valid = hmac.compare_digest(token.strip(), expected)
+        expected = get_token_digest()
+        received = hashlib.sha256(token.strip().encode("utf-8")).hexdigest()
+        is_valid = hmac.compare_digest(received, expected)
 
         if not is_valid:
             logger.warning("Intento de autenticación fallido.")
@@ -144,3 +197,45 @@ def verify_token(token: str) -> bool:
     except Exception as e:
         logger.error(f"Error verificando token: {e}")
         return False
+
+
+# ----------------------------------------------------------
+# 🔒 Dependencia FastAPI (Bearer)
+# ----------------------------------------------------------
+def auth_required(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer),
+) -> bool:
+    """
+    Dependencia común para proteger rutas con Bearer Token.
+    Lanza HTTP 401 si el token no es válido.
+
+    Un token verificado se da por bueno durante AUTH_CACHE_TTL segundos
+    sin volver a consultar verify_token. La caché se vacía al rotar el
+    token (create_token o cambio detectado en disco), así que un token
+    reemplazado deja de valer como mucho AUTH_CACHE_TTL segundos después
+    de editar el archivo a mano, e inmediatamente si lo rota el servidor.
+    """
+    token = credentials.credentials
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    now = time.monotonic()
+
+    with _auth_cache_lock:
+        expires = _auth_cache.get(key)
+        if expires is not None:
+            if expires > now:
+                return True
+            del _auth_cache[key]
+
+    if not verify_token(token):
+        logger.warning("❌ Acceso no autorizado detectado en la API.")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="No autorizado",
+        )
+
+    if AUTH_CACHE_TTL > 0:
+        with _auth_cache_lock:
+            if len(_auth_cache) >= AUTH_CACHE_MAX:
+                _auth_cache.pop(next(iter(_auth_cache)))  # la más antigua
+            _auth_cache[key] = now + AUTH_CACHE_TTL
+    return True
@@ -12,34 +12,36 @@ Características:
 - Uso de lifespan en lugar de @app.on_event para startup/shutdown.
 """
 
+import multiprocessing
 import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from contextlib import asynccontextmanager
 
+import anyio
 import uvicorn
-from fastapi import FastAPI, Request, HTTPException, Depends, status
+from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from Server.api_routes import router as api_router
+from Server.api_routes import router as api_router, add_enqueue_listener
 from Server.database import Database
-from Server.downloader import Downloader
-from Server.security import verify_token
+from Server.downloader import init_process, run_in_process
+from Server.security import auth_required
 from Core.paths import ensure_dirs
 from Core.logger import LoggerFactory
-from Core.app_config import AppConfig
+from Core.app_config import get_config
 
 
 # ==========================================================
 # ⚙️ Configuración base (AppConfig)
 # ==========================================================
-cfg = AppConfig()
-cfg.initialize()
+cfg = get_config()
 ensure_dirs()
 
 logger = LoggerFactory.get_logger("SERVER")
-security = HTTPBearer()  # Para Swagger / Authorize
 
 SERVER_NAME = cfg.get("server", "name", fallback="MVideoDk Central Server")
 SERVER_URL = cfg.get_server_url()
@@ -49,28 +51,106 @@ logger.info(f"✅ Servidor configurado: {SERVER_NAME} ({SERVER_URL})")
 # ==========================================================
 # 🧵 Worker central de descargas
 # ==========================================================
+# Espera máxima sin notify() antes de volver a mirar la cola
+IDLE_WAIT_S = 30.0
+# Máximo de tareas reclamadas por consulta a la DB (nunca más que huecos libres)
+PENDING_BATCH = max(1, cfg.getint("server", "pending_batch", fallback=5))
+# Descargas simultáneas (un proceso por descarga en curso). Valor pequeño por
+# defecto: cada proceso reimporta el servidor y arranca su propio Chromium
+MAX_PARALLEL_DOWNLOADS = max(
+    1, cfg.getint("server", "max_parallel_downloads", fallback=2)
+)
+# Espera máxima en el cierre a que las descargas atiendan la cancelación
+SHUTDOWN_WAIT_S = 10.0
+
+
+def _parse_cpu_set(spec: str) -> frozenset[int] | None:
+    """
+    Convierte "3" / "2,3" / "0-1,3" en un conjunto de CPUs.
+    Vacío o inválido → None (sin fijar afinidad).
+    """
+    cpus: set[int] = set()
+    try:
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            lo, _, hi = part.partition("-")
+            cpus.update(range(int(lo), int(hi or lo) + 1))
+    except ValueError:
+        logger.warning(f"⚠️ server.worker_cpus inválido: {spec!r}")
+        return None
+    return frozenset(cpus) or None
+
+
+# CPUs para los procesos de descarga (Linux). Vacío → sin afinidad
+WORKER_CPUS = _parse_cpu_set(cfg.get("server", "worker_cpus", fallback=""))
+
+
 class Worker:
     """
     Encapsula el hilo de trabajo que consume la cola de descargas.
 
     - Lee tareas PENDING desde la base de datos.
-    - Ejecuta descargas mediante Downloader (yt-dlp / Douyin, etc.).
-    - Soporta pausa, reanudación y cancelación de la tarea actual.
+    - Ejecuta descargas en un pool de procesos (MAX_PARALLEL_DOWNLOADS),
+      mediante Downloader (yt-dlp / Douyin, etc.).
+    - Soporta pausa, reanudación y cancelación de las tareas en curso.
     """
 
     def __init__(self):
-        self.db = Database()
-        self.downloader = Downloader()
+        # La DB se abre en el primer uso (no al importar el módulo)
+        self._db: Database | None = None
+        self._db_lock = threading.Lock()
 
         self.thread: threading.Thread | None = None
         self.stop_event = threading.Event()
         self.pause_event = threading.Event()
-        self.cancel_current_event = threading.Event()
+        # Copia sin lock de pause_event para las lecturas de la API
+        self.paused = False
+
+        # Pool de procesos y Events de cancelación compartidos (Manager)
+        self.pool: ProcessPoolExecutor | None = None
+        self._manager = None
+        self.current_tasks: dict[int, tuple[Future, object]] = {}
+        self._tasks_lock = threading.Lock()
+        # Set mientras no hay descargas en curso (restart_all espera por él)
+        self.idle_event = threading.Event()
+        self.idle_event.set()
 
-        self.current_task_id: int | None = None
         self.active = False
         self.restart_in_progress = False
 
+        # Tareas ya reclamadas (DOWNLOADING) a punto de enviarse al pool
+        self._pending: deque = deque()
+
+        # Serializa reclamar+enviar frente a restart()/pause()
+        self._dispatch_lock = threading.RLock()
+
+        # Despertar del bucle: notify() al encolar, reanudar o parar
+        self._cv = threading.Condition()
+        self._notified = False
+
+    @property
+    def db(self) -> Database:
+        """Database del worker, creada bajo demanda."""
+        if self._db is None:
+            with self._db_lock:
+                if self._db is None:
+                    self._db = Database()
+        return self._db
+
+    @property
+    def current_task_ids(self) -> list[int]:
+        """IDs de las descargas en curso."""
+        with self._tasks_lock:
+            return sorted(self.current_tasks)
+
+    @property
+    def current_task_id(self) -> int | None:
+        """Primera descarga en curso (compatibilidad con la GUI)."""
+        ids = self.current_task_ids
+        return ids[0] if ids else None
+
     # ------------------------------------------------------
     # 🚀 Control de ciclo de vida del hilo
     # ------------------------------------------------------
@@ -80,102 +160,288 @@ class Worker:
             return
         self.stop_event.clear()
         self.pause_event.clear()
-        self.cancel_current_event.clear()
+        self.paused = False
 
         self.thread = threading.Thread(target=self.loop, daemon=True)
         self.thread.start()
         self.active = True
         logger.info("🟢 DownloaderWorker iniciado correctamente.")
 
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        """Crea (o recrea si se rompió) el pool de procesos de descarga."""
+        if self.pool is None:
+            ctx = multiprocessing.get_context("spawn")
+            if self._manager is None:
+                self._manager = ctx.Manager()
+            self.pool = ProcessPoolExecutor(
+                max_workers=MAX_PARALLEL_DOWNLOADS,
+                mp_context=ctx,
+                initializer=init_process,
+                initargs=(WORKER_CPUS,),
+            )
+            logger.info(f"🧵 Pool de descargas: {MAX_PARALLEL_DOWNLOADS} proceso(s).")
+        return self.pool
+
+    def _submit(self, task) -> None:
+        """Lanza una tarea en el pool y la registra como en curso."""
+        task_id = task[0]
+        pool = self._ensure_pool()
+        cancel_event = self._manager.Event()
+
+        try:
+            fut = pool.submit(run_in_process, task, cancel_event)
+        except BrokenProcessPool:
+            logger.warning("⚠️ Pool de descargas roto: se recrea.")
+            self.pool = None
+            fut = self._ensure_pool().submit(run_in_process, task, cancel_event)
+
+        with self._tasks_lock:
+            self.current_tasks[task_id] = (fut, cancel_event)
+            self.idle_event.clear()
+        logger.info(f"⬇️ Iniciando descarga #{task_id}")
+        fut.add_done_callback(lambda f, tid=task_id: self._on_task_done(tid, f))
+
+    def _on_task_done(self, task_id: int, fut: Future) -> None:
+        with self._tasks_lock:
+            self.current_tasks.pop(task_id, None)
+            if not self.current_tasks:
+                self.idle_event.set()
+        exc = None if fut.cancelled() else fut.exception()
+        if exc is not None:
+            logger.error(f"Error en descarga #{task_id}: {exc}")
+            if isinstance(exc, BrokenProcessPool):
+                self.pool = None
+        else:
+            logger.info(f"✅ Descarga #{task_id} finalizada")
+        self.notify()  # hay un hueco libre en el pool
+
     def loop(self) -> None:
         """Bucle principal que consume la cola de tareas."""
         self.db.clean_stuck_tasks()
 
         while not self.stop_event.is_set():
             try:
-                # Pausa: no tomar nuevas tareas
-                if self.pause_event.is_set():
-                    time.sleep(1)
-                    continue
-
-                task = self.db.get_next_pending()
-                if not task:
-                    time.sleep(2)
-                    continue
-
-                self.current_task_id = task[0]
-                self.cancel_current_event.clear()
-
-                logger.info(f"⬇️ Iniciando descarga #{self.current_task_id}")
-                self.downloader.run(task, cancel_event=self.cancel_current_event)
-                logger.info(f"✅ Descarga #{self.current_task_id} finalizada")
+                if not self._dispatch_once():
+                    self._wait_for_work()
 
             except Exception as e:
                 logger.error(f"Error en loop del worker: {e}")
                 time.sleep(3)
-            finally:
-                self.current_task_id = None
 
+        self._shutdown_pool()
         logger.info("🔴 Worker detenido (loop finalizado).")
 
+    def _dispatch_once(self) -> bool:
+        """
+        Reclama y envía al pool como mucho una tarea.
+        Devuelve False si ahora no hay nada que hacer (pausa, pool lleno
+        o cola vacía). Corre bajo _dispatch_lock: restart() nunca ve una
+        fila reclamada que aún no esté registrada en current_tasks.
+        """
+        with self._dispatch_lock:
+            # Pausa: no tomar nuevas tareas
+            if self.pause_event.is_set():
+                self.clear_buffer()
+                return False
+
+            # Pool lleno: esperar a que termine alguna descarga
+            if len(self.current_tasks) >= MAX_PARALLEL_DOWNLOADS:
+                return False
+
+            # Solo se reclaman tantas filas como huecos libres: lo que
+            # está en DOWNLOADING es lo que de verdad se va a descargar
+            if not self._pending:
+                free = MAX_PARALLEL_DOWNLOADS - len(self.current_tasks)
+                self._pending.extend(
+                    self.db.get_next_pending_batch(min(PENDING_BATCH, free))
+                )
+            if not self._pending:
+                return False
+
+            task = self._pending.popleft()
+            try:
+                self._submit(task)
+            except Exception:
+                self.db.release_tasks([task[0]])  # no quedarse en DOWNLOADING
+                raise
+            return True
+
+    def _shutdown_pool(self) -> None:
+        """
+        Cancela lo que quede, espera (con tope) a que las descargas lo
+        atiendan y solo entonces cierra pool y Manager: un hijo que aún
+        consulta su Event no debe encontrarse el Manager ya cerrado.
+        """
+        self.cancel_current()
+        with self._tasks_lock:
+            futures = [fut for fut, _ in self.current_tasks.values()]
+
+        not_done = set()
+        if futures:
+            _, not_done = wait(futures, timeout=SHUTDOWN_WAIT_S)
+            if not_done:
+                logger.warning(
+                    f"⚠️ {len(not_done)} descarga(s) no atendieron la cancelación "
+                    f"en {SHUTDOWN_WAIT_S:.0f} s: se terminan sus procesos."
+                )
+
+        if self.pool is not None:
+            pool, self.pool = self.pool, None
+            pool.shutdown(wait=False, cancel_futures=True)
+            if not_done:
+                self._terminate_workers(pool)
+
+        if self._manager is not None:
+            try:
+                self._manager.shutdown()
+            except Exception:
+                pass
+            self._manager = None
+
+    @staticmethod
+    def _terminate_workers(pool: ProcessPoolExecutor) -> None:
+        """
+        Termina los procesos del pool que siguen vivos. Sin esto sus
+        procesos (no daemon) mantienen vivo el intérprete hasta acabar.
+        """
+        terminate = getattr(pool, "terminate_workers", None)  # Python 3.14+
+        if terminate is not None:
+            terminate()
+            return
+        # Versiones anteriores: no hay API pública para ello
+        for proc in list((getattr(pool, "_processes", None) or {}).values()):
+            if proc.is_alive():
+                proc.terminate()
+
+    def _wait_for_work(self, timeout: float = IDLE_WAIT_S) -> None:
+        """
+        Duerme hasta que llegue un notify() (o `timeout` como red de seguridad).
+        Si ya hubo un notify desde la última espera, vuelve enseguida.
+        """
+        with self._cv:
+            if not self._notified:
+                self._cv.wait(timeout)
+            self._notified = False
+
+    def notify(self) -> None:
+        """Despierta el bucle: hay trabajo nuevo o cambió el estado."""
+        with self._cv:
+            self._notified = True
+            self._cv.notify_all()
+
+    def clear_buffer(self) -> None:
+        """Vacía el buffer local y devuelve esas tareas a PENDING."""
+        ids = []
+        while self._pending:
+            try:
+                ids.append(self._pending.popleft()[0])
+            except IndexError:
+                break
+        self.db.release_tasks(ids)
+
     def pause(self) -> None:
-        """Detiene la toma de nuevas tareas (las actuales terminan)."""
-        self.pause_event.set()
+        """
+        Detiene la toma de nuevas tareas (las actuales terminan).
+        Toma _dispatch_lock: al volver, ningún _dispatch_once a medias puede
+        lanzar otra tarea, y el buffer local ya está devuelto a PENDING.
+        """
+        with self._dispatch_lock:
+            self.pause_event.set()
+            self.paused = True
+            self.clear_buffer()
         logger.info("🟠 Worker en pausa (no tomará nuevas tareas).")
 
     def resume(self) -> None:
         """Permite nuevamente tomar tareas PENDING de la cola."""
         self.pause_event.clear()
+        self.paused = False
+        self.notify()
         logger.info("🔵 Worker reanudado.")
 
     def cancel_current(self) -> bool:
         """
-        Solicita cancelación de la descarga en curso.
-        Devuelve True si había tarea activa, False en caso contrario.
+        Solicita cancelación de las descargas en curso.
+        Devuelve True si había alguna tarea activa, False en caso contrario.
         """
-        if self.current_task_id is not None:
-            self.cancel_current_event.set()
-            logger.info(f"🛑 Cancelación solicitada para #{self.current_task_id}")
-            return True
-        return False
+        self.clear_buffer()
+        with self._tasks_lock:
+            running = list(self.current_tasks.items())
+
+        for task_id, (fut, cancel_event) in running:
+            try:
+                cancel_event.set()
+            except Exception:
+                fut.cancel()  # Manager caído: al menos no arrancar la tarea
+            logger.info(f"🛑 Cancelación solicitada para #{task_id}")
+        return bool(running)
 
     def restart(self) -> None:
         """
-        Reinicia tareas DOWNLOADING → PENDING.
-        Útil al arrancar o tras un fallo.
+        Reinicia tareas DOWNLOADING → PENDING, salvo las que aún se están
+        descargando en el pool. Útil al arrancar o tras un fallo.
         """
-        self.db.clean_stuck_tasks()
+        with self._dispatch_lock:
+            self._pending.clear()  # clean_stuck_tasks ya las devuelve a PENDING
+            # Las que siguen en el pool no se tocan (se lanzarían dos veces)
+            with self._tasks_lock:
+                running = list(self.current_tasks)
+            self.db.clean_stuck_tasks(exclude_ids=running)
+        self.notify()
         logger.info("♻️ Cola reiniciada: tareas DOWNLOADING marcadas como PENDING.")
 
     def stop(self) -> None:
-        """Detiene el bucle del worker (usado en shutdown del servidor)."""
+        """
+        Detiene el bucle del worker (usado en shutdown del servidor) y
+        espera a que cierre el pool, para que el intérprete pueda salir.
+        """
         self.stop_event.set()
+        self.notify()
         self.active = False
         logger.info("🔴 Señal de parada enviada al Worker.")
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(SHUTDOWN_WAIT_S + 5)
 
 
 # Instancia global del Worker
 worker = Worker()
+add_enqueue_listener(worker.notify)
 
 
 # ==========================================================
-# 🔒 Autenticación global (Bearer)
+# 🧨 Reinicio total de la cola (bloqueante, fuera del event loop)
 # ==========================================================
-def auth_required(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-) -> bool:
+# Espera máxima a que las descargas canceladas terminen
+IDLE_TIMEOUT_S = 5.0
+
+
+def _restart_all() -> None:
     """
-    Dependencia global para proteger rutas con Bearer Token.
-    Lanza HTTP 401 si el token no es válido.
+    Pausa el worker, vacía tareas y contadores y lo reanuda.
+    Lanza TimeoutError (sin tocar la DB) si las descargas canceladas no
+    terminan a tiempo; el worker vuelve al estado de pausa previo.
     """
-    token = credentials.credentials
-    if not verify_token(token):
-        logger.warning("❌ Intento de acceso no autorizado")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="No autorizado",
-        )
-    return True
+    was_paused = worker.paused
+    worker.restart_in_progress = True
+    worker.pause()
+
+    try:
+        # Cancelar lo que esté en curso y esperar a que terminen (incluido
+        # el post-procesado): así ninguna descarga escribe tras el reset.
+        worker.cancel_current()
+        if not worker.idle_event.wait(timeout=IDLE_TIMEOUT_S):
+            raise TimeoutError(
+                f"descargas aún activas tras {IDLE_TIMEOUT_S:g}s; no se reinicia la cola"
+            )
+
+        # Misma instancia del worker (conexión por hilo, sin reabrir SQLite)
+        worker.db.reset_tasks_and_ids()
+        worker.db.reset_counters()
+        worker.db.vacuum_async()
+
+    finally:
+        worker.restart_in_progress = False
+        if not was_paused:
+            worker.resume()
 
 
 # ==========================================================
@@ -209,13 +475,21 @@ def create_app() -> FastAPI:
         lifespan=lifespan,
     )
 
-    # CORS global (permitir GUI, extensión, móvil, etc.)
+    # CORS (GUI, extensión, móvil…): orígenes desde config.ini.
+    # Métodos/cabeceras explícitos y max_age → el navegador cachea el preflight.
+    # Con "*" no se permiten credenciales (combinación inválida según la spec).
+    origins = [
+        o.strip()
+        for o in cfg.get("server", "cors_origins", fallback="*").split(",")
+        if o.strip()
+    ] or ["*"]
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+        allow_origins=origins,
+        allow_credentials="*" not in origins,
+        allow_methods=["GET", "POST", "HEAD", "OPTIONS"],
+        allow_headers=["Authorization", "Content-Type"],
+        max_age=86400,
     )
 
     # ------------------------------------------------------
@@ -224,18 +498,11 @@ def create_app() -> FastAPI:
     @app.exception_handler(Exception)
     async def global_exception_handler(request: Request, exc: Exception):
         """
-        Manejador global de errores no capturados.
+        Manejador global de errores no capturados → 500 con mensaje genérico.
 
-        - Respeta HTTPException (reenvía status y detail).
-        - Cualquier otro error → 500 con mensaje genérico.
+        HTTPException no llega aquí: la resuelve el handler nativo de
+        FastAPI (ExceptionMiddleware), que conserva status, detail y headers.
         """
-        if isinstance(exc, HTTPException):
-            # Dejar que la semántica HTTP se mantenga
-            return JSONResponse(
-                status_code=exc.status_code,
-                content={"detail": exc.detail},
-            )
-
         logger.error(f"Unhandled error: {exc}")
         return JSONResponse(
             status_code=500,
@@ -245,6 +512,14 @@ def create_app() -> FastAPI:
     # Rutas principales de API
     app.include_router(api_router)
 
+    # ------------------------------------------------------
+    # 💓 Health-check mínimo (sin auth, sin cuerpo útil)
+    # ------------------------------------------------------
+    @app.api_route("/health", methods=["GET", "HEAD"])
+    def health():
+        """Liveness para el launcher: 200 sin tocar DB ni token."""
+        return {"ok": True}
+
     # ------------------------------------------------------
     # 🎛️ Endpoints de control del Worker / Cola
     # ------------------------------------------------------
@@ -263,8 +538,10 @@ def create_app() -> FastAPI:
         body = await request.json()
         action = body.get("action")
 
+        # Las acciones que tocan la DB o esperan a _dispatch_lock se ejecutan
+        # en el threadpool de anyio para no bloquear el event loop de uvicorn.
         if action == "pause_worker":
-            worker.pause()
+            await anyio.to_thread.run_sync(worker.pause)
             return {"detail": "🟠 Worker pausado.", "worker_paused": True}
 
         if action == "resume_worker":
@@ -272,14 +549,14 @@ def create_app() -> FastAPI:
             return {"detail": "🔵 Worker reanudado.", "worker_paused": False}
 
         if action == "restart_worker":
-            worker.restart()
+            await anyio.to_thread.run_sync(worker.restart)
             return {
                 "detail": "♻️ Cola reiniciada.",
-                "worker_paused": worker.pause_event.is_set(),
+                "worker_paused": worker.paused,
             }
 
         if action == "cancel_current":
-            if worker.cancel_current():
+            if await anyio.to_thread.run_sync(worker.cancel_current):
                 return {"detail": "🛑 Descarga actual cancelada."}
             raise HTTPException(status_code=409, detail="No hay tarea en ejecución")
 
@@ -290,26 +567,17 @@ def create_app() -> FastAPI:
                     "🧨 Reinicio TOTAL de cola solicitado "
                     "(borrado completo y reinicio de contadores)."
                 )
-
-                worker.restart_in_progress = True
-                worker.pause()
-
-                db = Database()
-                db.reset_tasks_and_ids()
-                db.reset_counters()
-
-                # Intentar cancelar si justo estaba ejecutando algo
-                worker.cancel_current()
-                worker.current_task_id = None
-                worker.restart_in_progress = False
-                worker.resume()
+                await anyio.to_thread.run_sync(_restart_all)
 
                 msg = "🧨 Cola limpiada completamente y contadores reiniciados."
                 logger.info(msg)
                 return {"detail": msg}
 
+            except TimeoutError as e:
+                logger.warning(f"⚠️ restart_all cancelado: {e}")
+                raise HTTPException(status_code=409, detail=f"restart_all: {e}")
+
             except Exception as e:
-                worker.restart_in_progress = False
                 logger.error(f"❌ Error durante restart_all: {e}")
                 raise HTTPException(
                     status_code=500,
@@ -325,12 +593,14 @@ def create_app() -> FastAPI:
 
         - worker_paused       → si está en pausa o no.
         - current_task_id     → id de tarea en curso (o None).
+        - current_task_ids    → todas las descargas en curso (pool paralelo).
         - restart_in_progress → flag auxiliar para flujos avanzados.
         """
         return {
-            "worker_paused": worker.pause_event.is_set(),
+            "worker_paused": worker.paused,
             "current_task_id": worker.current_task_id,
-            "restart_in_progress": getattr(worker, "restart_in_progress", False),
+            "current_task_ids": worker.current_task_ids,
+            "restart_in_progress": worker.restart_in_progress,
         }
 
     return app
@@ -348,8 +618,38 @@ def run_server() -> None:
     port = cfg.get_server_port()
     reload = cfg.getboolean("server", "reload", fallback=False)
 
+    # "auto" → uvloop/httptools si están instalados (uvloop no existe en Windows)
+    loop = cfg.get("server", "loop", fallback="auto").strip() or "auto"
+    http = cfg.get("server", "http", fallback="auto").strip() or "auto"
+    workers = cfg.getint("server", "workers", fallback=1)
+    # Una línea por petición con la GUI sondeando cada segundo: off por defecto
+    access_log = cfg.getboolean("server", "access_log", fallback=False)
+
+    if workers != 1:
+        # El Worker de descargas vive dentro del proceso del servidor: con
+        # varios procesos uvicorn, cada uno devolvería a PENDING las tareas
+        # en curso de los demás (descargas duplicadas) y pausa/cancelación
+        # solo llegarían a uno de ellos.
+        logger.warning(
+            f"⚠️ server.workers={workers} no soportado: se usa 1 proceso uvicorn "
+            "(el paralelismo de descargas es server.max_parallel_downloads)."
+        )
+        workers = 1
+
+    # uvicorn necesita import string para recargar
+    target = "Server.server:app" if reload else app
+
     logger.info(f"🚀 Iniciando servidor FastAPI en {host}:{port} ...")
-    uvicorn.run(app, host=host, port=port, reload=reload)
+    uvicorn.run(
+        target,
+        host=host,
+        port=port,
+        reload=reload,
+        loop=loop,
+        http=http,
+        workers=workers,
+        access_log=access_log,
+    )
 
 
 if __name__ == "__main__":
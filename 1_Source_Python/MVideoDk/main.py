@@ -6,15 +6,17 @@ Lanzador principal de MVideoDk:
 - Inicia el servidor FastAPI en un hilo daemon.
 - Espera que el servidor esté activo.
 - Lanza la GUI en el hilo principal.
+- Al cerrar la GUI detiene el servidor (lifespan → worker y pool de descargas).
 - No gestiona túneles: eso es responsabilidad de la GUI.
 
 Compatible con ejecución normal y con PyInstaller (frozen).
 """
 
+import multiprocessing
 import threading
 import time
 import sys
-import requests
+import urllib3
 from pathlib import Path
 import uvicorn
 from uvicorn import Config, Server
@@ -32,41 +34,58 @@ sys.path.insert(0, str(ROOT / "Core"))
 sys.path.insert(0, str(ROOT / "Server"))
 sys.path.insert(0, str(ROOT / "Client_GUI"))
 
-from Core.app_config import AppConfig
+from Core.app_config import get_config
 from Core.logger import LoggerFactory
-from Server.server import app as fastapi_app
+from Server.server import app as fastapi_app, worker, SHUTDOWN_WAIT_S
 
 logger = LoggerFactory.get_logger("MAIN")
 
+# Pool urllib3 (1 conexión keep-alive): sin hooks/cookies/adapters de requests
+_pool = urllib3.PoolManager(num_pools=1, maxsize=1, retries=False)
+_PROBE_TIMEOUT = urllib3.Timeout(connect=0.2, read=0.2)
+
 
 # ==========================================================
 # 🔥 Iniciar servidor en un hilo (daemon)
 # ==========================================================
-def server_thread_start() -> threading.Thread:
+def server_thread_start() -> tuple[threading.Thread, Server]:
     """
     Lanza el servidor FastAPI dentro de un hilo daemon.
-    Devuelve el objeto Thread.
+    Devuelve el Thread y el Server de uvicorn (para detenerlo con stop_server).
     """
-    cfg = AppConfig()
+    cfg = get_config()
     host = cfg.get_server_host()
     port = cfg.get_server_port()
-
-    def _run():
-        uvconfig = Config(
-            app=fastapi_app,
-            host=host,
-            port=port,
-            reload=False,
-            workers=1,
-            log_level="info",
-        )
-        server = Server(uvconfig)
-        server.run()
-
-    t = threading.Thread(target=_run, daemon=True)
+    access_log = cfg.getboolean("server", "access_log", fallback=False)
+
+    uvconfig = Config(
+        app=fastapi_app,
+        host=host,
+        port=port,
+        reload=False,
+        workers=1,
+        log_level="info",
+        access_log=access_log,
+    )
+    server = Server(uvconfig)
+
+    t = threading.Thread(target=server.run, daemon=True)
     t.start()
     logger.info(f"🚀 Servidor FastAPI lanzado en hilo daemon ({host}:{port})")
-    return t
+    return t, server
+
+
+def stop_server(thread: threading.Thread, server: Server) -> None:
+    """
+    Detiene uvicorn y espera a su lifespan, que para el worker y cierra el
+    pool de descargas. Los procesos del pool no son daemon: sin esto, el
+    intérprete esperaría a que terminase cada descarga en curso.
+    """
+    server.should_exit = True
+    thread.join(SHUTDOWN_WAIT_S + 10)
+    if thread.is_alive():
+        logger.warning("⚠️ uvicorn no se detuvo a tiempo; parando el worker directamente.")
+        worker.stop()
 
 
 # ==========================================================
@@ -75,17 +94,18 @@ def server_thread_start() -> threading.Thread:
 def wait_for_server(url: str, timeout: int = 10) -> bool:
     """
     Intenta conectarse al servidor FastAPI hasta que responda.
+    Usa HEAD sobre /health: no descarga cuerpo y reutiliza la conexión.
     """
     logger.info(f"⏳ Esperando servidor en {url} (timeout={timeout}s)...")
     start = time.time()
 
     while time.time() - start < timeout:
         try:
-            requests.get(url)
+            _pool.request("HEAD", url.rstrip("/") + "/health", timeout=_PROBE_TIMEOUT)
             logger.info("✔ Servidor respondió correctamente.")
             return True
-        except Exception:
-            time.sleep(0.4)
+        except urllib3.exceptions.HTTPError:
+            time.sleep(0.1)
 
     logger.error("❌ El servidor no respondió dentro del tiempo.")
     return False
@@ -97,17 +117,18 @@ def wait_for_server(url: str, timeout: int = 10) -> bool:
 def main() -> None:
     logger.info("🚀 Iniciando MVideoDk Launcher...")
 
-    cfg = AppConfig()
+    cfg = get_config()
     cfg.ensure_dirs()
 
     server_url = cfg.get_server_url()
 
     # 1) Lanzar servidor FastAPI
-    server_thread_start()
+    thread, server = server_thread_start()
 
     # 2) Esperar al servidor
     if not wait_for_server(server_url, timeout=12):
         logger.error("❌ Abortando porque el servidor no está disponible.")
+        stop_server(thread, server)
         return
 
     logger.info(f"✔ Servidor activo en {server_url}")
@@ -115,12 +136,14 @@ def main() -> None:
     # 3) Lanzar GUI (que también gestiona el túnel)
     try:
         from Client_GUI.mvideodk_main import run_gui
-        run_gui()
+        run_gui()  # termina con sys.exit(app.exec())
     except Exception as e:
         logger.error(f"❌ Error al iniciar la GUI: {e}")
         return
-
-    logger.info("🎨 GUI cerrada. Limpiando recursos...")
+    finally:
+        # También con SystemExit: el servidor se detiene antes de salir
+        logger.info("🎨 GUI cerrada. Limpiando recursos...")
+        stop_server(thread, server)
 
     # Nota: el túnel Cloudflare se gestiona en la GUI, no aquí.
 
@@ -129,4 +152,6 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    # Necesario en el .exe para los procesos hijos (pool de descargas)
+    multiprocessing.freeze_support()
     main()
@@ -11,18 +11,47 @@ para exponer públicamente el servidor FastAPI de MVideoDk.
 No requiere modificaciones en otros módulos.
 """
 
+import queue
 import subprocess
-import time
+import threading
 import re
 from pathlib import Path
 
-from Core.app_config import AppConfig
+from Core.app_config import get_config
 from Core.paths import data_dir, logs_dir, bin_dir
 from Core.logger import LoggerFactory
 
 
 logger = LoggerFactory.get_logger("TUNNEL")
 
+# Tiempo máximo esperando a que cloudflared publique la URL
+TUNNEL_URL_TIMEOUT_S = 15
+
+# URL pública del túnel rápido (patrón bytes: se aplica sin decodificar)
+_TRYCF_RE = re.compile(rb"https://[a-zA-Z0-9\-]+\.trycloudflare\.com")
+
+
+def _watch_tunnel_output(stream, found: "queue.Queue") -> None:
+    """
+    Lee stderr de cloudflared (binario) línea a línea.
+    Publica en `found` la primera URL trycloudflare (o None si el proceso
+    termina sin darla) y sigue drenando el pipe para que no se llene.
+    """
+    reported = False
+    try:
+        for line in stream:
+            if reported:
+                continue
+            match = _TRYCF_RE.search(line)
+            if match:
+                found.put(match.group(0).decode("ascii"))
+                reported = True
+    except Exception as e:
+        logger.warning(f"⚠️ Error leyendo salida del túnel: {e}")
+    finally:
+        if not reported:
+            found.put(None)
+
 
 # ==========================================================
 # 🔚 DETENER TÚNEL — Seguro
@@ -41,11 +70,13 @@ def stop_cloudflare_tunnel(proc) -> None:
         if proc.poll() is None:
             logger.info("🔻 Deteniendo túnel Cloudflare...")
             proc.terminate()
-            time.sleep(0.3)
-
-            if proc.poll() is None:
+            try:
+                # Vuelve en cuanto cloudflared sale (normalmente pocos ms)
+                proc.wait(timeout=0.3)
+            except subprocess.TimeoutExpired:
                 logger.warning("⚠️ Terminación suave falló, forzando kill()")
                 proc.kill()
+                proc.wait(timeout=1)
     except Exception as e:
         logger.error(f"❌ Error deteniendo túnel: {e}")
 
@@ -61,7 +92,7 @@ def start_cloudflare_tunnel():
         tuple:
             (public_url:str | None, process:subprocess.Popen | None)
     """
-    cfg = AppConfig()
+    cfg = get_config()
 
     server_host = cfg.get_server_host()
     server_port = cfg.get_server_port()
@@ -102,7 +133,7 @@ def start_cloudflare_tunnel():
         tunnel_process = subprocess.Popen(
             cloudflared_cmd,
             stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
             creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
         )
         logger.info("⏳ Iniciando túnel Cloudflare...")
@@ -111,25 +142,21 @@ def start_cloudflare_tunnel():
         return None, None
 
     # ----------------------------------------------------------
-    # Leer URL pública desde el log (máx ~10 seg)
+    # Leer URL pública desde stderr en cuanto aparece
+    # (el log en disco queda solo para diagnóstico)
     # ----------------------------------------------------------
-    tunnel_public_url = None
-
-    for _ in range(40):
-        try:
-            if tunnel_log_path.exists():
-                log_content = tunnel_log_path.read_text(errors="ignore")
-                match = re.search(
-                    r"https://[a-zA-Z0-9\-]+\.trycloudflare\.com",
-                    log_content,
-                )
-                if match:
-                    tunnel_public_url = match.group(0)
-                    break
-        except Exception as e:
-            logger.warning(f"⚠️ Error leyendo log del túnel: {e}")
-
-        time.sleep(0.25)
+    found: queue.Queue = queue.Queue(maxsize=1)
+    threading.Thread(
+        target=_watch_tunnel_output,
+        args=(tunnel_process.stderr, found),
+        name="TunnelOutput",
+        daemon=True,
+    ).start()
+
+    try:
+        tunnel_public_url = found.get(timeout=TUNNEL_URL_TIMEOUT_S)
+    except queue.Empty:
+        tunnel_public_url = None
 
     if not tunnel_public_url:
         logger.error("❌ No se pudo obtener la URL pública del túnel.")